@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Synthetic datasets: teams, simulation runs per team, venues and games
+DATASETS = {
+    "small": {"teams": 200, "runs_per_team": 10, "venues": 8, "games": 2_000},
+    "medium": {"teams": 200, "runs_per_team": 1_000, "venues": 8, "games": 2_000},
+    "large": {"teams": 200, "runs_per_team": 100_000, "venues": 8, "games": 5_000},
+}
+
+# Timed calls per request benchmark (create_database is timed once)
+REPEATS = 50
+# A benchmark regresses when its median exceeds the baseline by this fraction
+DEFAULT_TOLERANCE = 0.25
+SEED = 1234
+# Runs per POST /api/simulations/runs call in the ingest benchmark
+INGEST_BATCH_RUNS = 1_000
+
+
+def write_dataset(data_dir, teams, runs_per_team, venues, games, seed=SEED):
+    """Write simulations.csv, venues.csv and games.csv in the layout setup_database expects"""
+    rng = random.Random(seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    team_names = [f"Synthetic Team {team_id:03d}" for team_id in range(teams)]
+
+    with open(data_dir / "simulations.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["team_id", "team", "simulation_run", "results"])
+        for team_id, name in enumerate(team_names):
+            strength = rng.gauss(150, 15)
+            writer.writerows(
+                (team_id, name, run, max(0, round(rng.gauss(strength, 20))))
+                for run in range(1, runs_per_team + 1)
+            )
+
+    with open(data_dir / "venues.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["venue_id", "venue_name", "home_multiplier"])
+        for venue_id in range(venues):
+            writer.writerow([venue_id, f"Synthetic Ground {venue_id}", round(rng.uniform(0.8, 1.3), 2)])
+
+    with open(data_dir / "games.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["home_team", "away_team", "date", "venue_id"])
+        fixtures = set()
+        while len(fixtures) < games:
+            home, away = rng.sample(range(teams), 2)
+            date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            fixtures.add((home, away, date))
+        for home, away, date in sorted(fixtures):
+            writer.writerow([team_names[home], team_names[away], date, rng.randrange(venues)])
+
+
+def summarize(timings):
+    """Median, p95, min and max of a list of durations, in milliseconds"""
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))]
+    return {
+        "calls": len(timings),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "max_ms": round(timings[-1] * 1000, 3),
+    }
+
+
+def time_requests(make_request, repeats, before_each=None):
+    timings = []
+    for i in range(repeats):
+        if before_each is not None:
+            before_each()
+        start = time.perf_counter()
+        response = make_request(i)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return summarize(timings)
+
+
+def run_dataset(name, spec, repeats):
+    """Build one synthetic dataset and time setup and the hot endpoints against it"""
+    import main
+    import setup_database
+    from database import Database
+
+    with tempfile.TemporaryDirectory(prefix=f"plutodata-bench-{name}-") as root:
+        backend_dir = Path(root) / "backend"
+        backend_dir.mkdir()
+        write_dataset(Path(root) / "data", **spec)
+
+        # setup_database resolves ../data from the cwd; the database path is
+        # passed explicitly so PLUTODATA_DB never points the run elsewhere
+        database_path = str(backend_dir / "plutodata.db")
+        previous_cwd = os.getcwd()
+        previous_database = (main.DATABASE_PATH, main.database)
+        os.chdir(backend_dir)
+        main.DATABASE_PATH, main.database = database_path, Database(database_path)
+        try:
+            results = {}
+            with contextlib.redirect_stdout(sys.stderr):
+                start = time.perf_counter()
+                setup_database.create_database(database_path)
+                results["create_database"] = summarize([time.perf_counter() - start])
+
+                rng = random.Random(SEED)
+                teams = list(range(spec["teams"]))
+                venues = list(range(spec["venues"]))
+                clear_cache = main.result_cache.clear
+
+                with TestClient(main.app) as client:
+                    results["simulate_match"] = time_requests(
+                        lambda i: client.post("/api/simulations/simulate-match", json={
+                            "team_a": rng.choice(teams), "team_b": rng.choice(teams), "venue": rng.choice(venues),
+                        }),
+                        repeats, clear_cache,
+                    )
+                    results["get_games"] = time_requests(
+                        lambda i: client.get("/api/games"), repeats, clear_cache,
+                    )
+                    results["get_games_page"] = time_requests(
+                        lambda i: client.get("/api/games", params={"limit": 100, "team_id": rng.choice(teams)}),
+                        repeats, clear_cache,
+                    )
+                    results["get_simulations"] = time_requests(
+                        lambda i: client.get("/api/simulations", params={"limit": 1000}), repeats,
+                    )
+                    results["get_simulations_team"] = time_requests(
+                        lambda i: client.get("/api/simulations", params={"team_id": rng.choice(teams), "limit": 1000}),
+                        repeats,
+                    )
+
+                    # Ingest benchmarks add runs, so they go last
+                    new_runs = itertools.count(spec["runs_per_team"] + 1)
+
+                    def runs_payload(team_id, size):
+                        runs = [{"simulation_run": next(new_runs), "results": rng.randint(80, 220)} for _ in range(size)]
+                        return {"team_id": team_id, "runs": runs}
+
+                    payloads = [runs_payload(rng.choice(teams), INGEST_BATCH_RUNS) for _ in range(repeats)]
+                    results["ingest_runs"] = time_requests(
+                        lambda i: client.post("/api/simulations/runs", json=payloads[i]), repeats,
+                    )
+
+                    ingested = []
+
+                    def ingest_one_run():
+                        payload = runs_payload(rng.choice(teams), 1)
+                        client.post("/api/simulations/runs", json=payload).raise_for_status()
+                        ingested.append(payload["team_id"])
+
+                    results["simulate_match_after_ingest"] = time_requests(
+                        lambda i: client.post("/api/simulations/simulate-match", json={
+                            "team_a": ingested[-1], "team_b": rng.choice(teams), "venue": rng.choice(venues),
+                        }),
+                        repeats, ingest_one_run,
+                    )
+        finally:
+            main.database.close()
+            main.DATABASE_PATH, main.database = previous_database
+            main.simulation_store.loaded = False
+            os.chdir(previous_cwd)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regressions as (dataset, benchmark, baseline ms, current ms) tuples"""
+    regressions = []
+    for dataset, benchmarks in results["datasets"].items():
+        for benchmark, stats in benchmarks.items():
+            previous = baseline.get("datasets", {}).get(dataset, {}).get(benchmark)
+            if previous and stats["median_ms"] > previous["median_ms"] * (1 + tolerance):
+                regressions.append((dataset, benchmark, previous["median_ms"], stats["median_ms"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time setup and the hot API endpoints on synthetic data")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="Comma-separated subset of " + ", ".join(DATASETS))
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--output", help="Write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="Compare against this JSON file and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeats": args.repeats,
+        "datasets": {},
+    }
+    for name in args.datasets.split(","):
+        spec = DATASETS[name]
+        print(f"⏱️  {name}: {spec['teams']} teams x {spec['runs_per_team']:,} runs, {spec['games']:,} games")
+        results["datasets"][name] = run_dataset(name, spec, args.repeats)
+        for benchmark, stats in results["datasets"][name].items():
+            print(f"   {benchmark:<22} median {stats['median_ms']:>10.2f} ms   p95 {stats['p95_ms']:>10.2f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for dataset, benchmark, previous, current in regressions:
+            print(f"❌ {dataset}/{benchmark}: {previous:.2f} ms -> {current:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} of {args.baseline}")
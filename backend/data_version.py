@@ -0,0 +1,21 @@
+import sqlite3
+
+
+def read_data_version(cursor):
+    """Return the version of the loaded data (0 if it has never been recorded)"""
+    try:
+        cursor.execute("SELECT value FROM metadata WHERE key = 'data_version'")
+    except sqlite3.OperationalError:
+        return 0
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+def bump_data_version(cursor):
+    """Record that the data changed so derived tables and caches are rebuilt"""
+    data_version = read_data_version(cursor) + 1
+    cursor.execute(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('data_version', ?)",
+        (str(data_version),)
+    )
+    return data_version
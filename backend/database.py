@@ -0,0 +1,223 @@
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+DATABASE_PATH = os.environ.get("PLUTODATA_DB", "plutodata.db")
+DB_POOL_SIZE = int(os.environ.get("PLUTODATA_DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = 30
+
+
+class ConnectionPool:
+    """Bounded pool of read-only SQLite connections
+
+    Connections are opened lazily up to `size`. When all of them are busy,
+    callers block until one is returned (or `timeout` seconds pass). The idle
+    queue may also hold None, a free slot in which a connection is opened.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.database_path = database_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        # close() bumps the generation; connections from an older one are retired
+        self._generation = 0
+        self._connection_generations = {}
+        self._in_use = 0
+        self._dedicated_in_use = 0
+        self._peak_in_use = 0
+        self._acquisitions = 0
+        self._saturated_acquisitions = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _connect(self):
+        uri = Path(self.database_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This allows accessing columns by name
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _open_in_slot(self):
+        """Open a connection in a slot already counted in _created"""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._connection_generations[conn] = self._generation
+        return conn
+
+    def _acquire(self):
+        start = time.perf_counter()
+        saturated = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                conn = None
+            else:
+                saturated = True
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No database connection available after {self.timeout}s")
+        if conn is None:
+            conn = self._open_in_slot()
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._acquisitions += 1
+            self._saturated_acquisitions += saturated
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            self._in_use -= 1
+            retired = self._connection_generations[conn] != self._generation
+            if retired:
+                del self._connection_generations[conn]
+        if retired:
+            # Borrowed before close(): close it and hand its slot to the next caller
+            conn.close()
+            self._idle.put(None)
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def dedicated_connection(self):
+        """Open a read-only connection outside the pool for a long-running read
+
+        It does not take one of the `size` pooled connections, so a slow
+        reader such as a streamed export cannot starve request handlers.
+        """
+        conn = self._connect()
+        with self._lock:
+            self._dedicated_in_use += 1
+        try:
+            yield conn
+        finally:
+            conn.close()
+            with self._lock:
+                self._dedicated_in_use -= 1
+
+    def close(self):
+        """Close idle connections; busy ones are closed when returned
+
+        The pool stays usable: later callers open new connections lazily.
+        """
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                self._connection_generations.pop(conn, None)
+                self._created -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open_connections": len(self._connection_generations),
+                "in_use": self._in_use,
+                "dedicated_in_use": self._dedicated_in_use,
+                "peak_in_use": self._peak_in_use,
+                "acquisitions": self._acquisitions,
+                "saturated_acquisitions": self._saturated_acquisitions,
+                "total_wait_seconds": round(self._total_wait_seconds, 6),
+                "max_wait_seconds": round(self._max_wait_seconds, 6),
+            }
+
+
+def _fetch_all(conn, query, params):
+    return conn.execute(query, params).fetchall()
+
+
+def _fetch_one(conn, query, params):
+    return conn.execute(query, params).fetchone()
+
+
+class Database:
+    """Runs read queries on pooled connections in worker threads
+
+    The async handlers await these methods, so a slow query occupies a worker
+    thread instead of stalling the event loop.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, pool_size=DB_POOL_SIZE):
+        self.pool = ConnectionPool(database_path, pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sqlite")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._peak_queued = 0
+        self._total_queue_seconds = 0.0
+
+    def _run(self, submitted, func, args):
+        with self._lock:
+            self._queued -= 1
+            self._total_queue_seconds += time.perf_counter() - submitted
+        with self.pool.connection() as conn:
+            return func(conn, *args)
+
+    async def run(self, func, *args):
+        """Call func(conn, *args) on a pooled connection in a worker thread"""
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, time.perf_counter(), func, args)
+
+    async def fetch_all(self, query, params=()):
+        return await self.run(_fetch_all, query, params)
+
+    async def fetch_one(self, query, params=()):
+        return await self.run(_fetch_one, query, params)
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        with self._lock:
+            executor_stats = {
+                "worker_threads": self.pool.size,
+                "queued": self._queued,
+                "peak_queued": self._peak_queued,
+                "total_queue_seconds": round(self._total_queue_seconds, 6),
+            }
+        return {**executor_stats, "pool": self.pool.stats()}
+
+
+# Process-wide database shared by all request handlers
+database = Database()
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+
+import numpy as np
+
+from matchup_engine import as_scores
+
+# Rows fetched from SQLite, or pairings generated, per streamed chunk
+EXPORT_CHUNK_ROWS = 10_000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+SIMULATION_EXPORT_COLUMNS = ["id", "team_id", "team_name", "simulation_run", "results"]
+OUTCOME_EXPORT_COLUMNS = ["home_score", "away_score", "adjusted_home_score", "total_score", "home_win"]
+
+
+def format_rows(rows, columns, export_format, include_header=False):
+    """Render a chunk of row tuples as NDJSON lines or CSV text"""
+    if export_format == "ndjson":
+        return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if include_header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_simulation_rows(pool, export_format, team_id=None):
+    """Yield the simulations table chunk by chunk from a server-side cursor
+
+    The export reads on its own connection rather than a pooled one, since
+    it is held for the whole export. Only EXPORT_CHUNK_ROWS rows are in
+    memory at a time.
+    """
+    query = """
+        SELECT s.id, s.team_id, t.name, s.simulation_run, s.results
+        FROM simulations s
+        JOIN teams t ON s.team_id = t.id
+    """
+    params = ()
+    if team_id is not None:
+        query += " WHERE s.team_id = ?"
+        params = (team_id,)
+    query += " ORDER BY s.team_id, s.simulation_run"
+
+    with pool.dedicated_connection() as conn:
+        cursor = conn.execute(query, params)
+        if export_format == "csv":
+            yield format_rows([], SIMULATION_EXPORT_COLUMNS, export_format, include_header=True)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            yield format_rows([tuple(row) for row in rows], SIMULATION_EXPORT_COLUMNS, export_format)
+
+
+def stream_matchup_outcomes(home_scores, away_scores, home_multiplier, export_format):
+    """Yield every (home, away) pairing of a matchup, a block of home runs at a time"""
+    home_scores = as_scores(home_scores)
+    away_scores = as_scores(away_scores)
+    if export_format == "csv":
+        yield format_rows([], OUTCOME_EXPORT_COLUMNS, export_format, include_header=True)
+    if len(home_scores) == 0 or len(away_scores) == 0:
+        return
+
+    home_block = max(1, EXPORT_CHUNK_ROWS // len(away_scores))
+    for start in range(0, len(home_scores), home_block):
+        block = home_scores[start:start + home_block]
+        home_column = np.repeat(block, len(away_scores))
+        away_column = np.tile(away_scores, len(block))
+        adjusted_column = home_column * home_multiplier
+        rows = zip(
+            home_column.tolist(),
+            away_column.tolist(),
+            adjusted_column.tolist(),
+            (adjusted_column + away_column).tolist(),
+            (adjusted_column > away_column).tolist(),
+        )
+        yield format_rows(list(rows), OUTCOME_EXPORT_COLUMNS, export_format)
@@ -0,0 +1,241 @@
+import csv
+import itertools
+import operator
+import os
+import time
+
+import numpy as np
+
+from data_version import bump_data_version, read_data_version
+from team_stats import add_team_score_counts, team_stats_version
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Parquet and Arrow input need pyarrow; CSV is read without it
+    pyarrow = None
+
+# Rows parsed, converted and inserted per step; this bounds ingest memory
+INGEST_CHUNK_ROWS = 250_000
+# Bytes pyarrow's CSV reader parses per block
+CSV_BLOCK_BYTES = 16 << 20
+# Most runs accepted for one team in one API call
+MAX_APPEND_RUNS = 100_000
+
+SIMULATION_COLUMNS = ("team_id", "team", "simulation_run", "results")
+INPUT_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+# Checked in this order, so a columnar export wins over a CSV of the same data
+SIMULATION_INPUT_NAMES = ("simulations.parquet", "simulations.arrow", "simulations.feather", "simulations.csv")
+
+
+def find_simulations_input(data_dir):
+    """Path of the simulations file in data_dir (the CSV path if there is none)"""
+    for name in SIMULATION_INPUT_NAMES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            return path
+    return os.path.join(data_dir, "simulations.csv")
+
+
+def _require_pyarrow(path):
+    if pyarrow is None:
+        raise RuntimeError(f"Reading {os.path.basename(path)} requires pyarrow (pip install pyarrow)")
+
+
+def _arrow_chunk(batch):
+    """Columns of a pyarrow RecordBatch as (team_ids, team names, runs, results)"""
+    return (
+        batch.column("team_id").to_numpy(zero_copy_only=False).astype(np.int64, copy=False),
+        batch.column("team").to_pylist(),
+        batch.column("simulation_run").to_numpy(zero_copy_only=False).astype(np.int64, copy=False),
+        batch.column("results").to_numpy(zero_copy_only=False).astype(np.int64, copy=False),
+    )
+
+
+def _slices(batch, chunk_rows):
+    for start in range(0, batch.num_rows, chunk_rows):
+        yield batch.slice(start, chunk_rows)
+
+
+def _int_column(rows, column):
+    return np.fromiter(map(int, map(operator.itemgetter(column), rows)), dtype=np.int64, count=len(rows))
+
+
+def _csv_chunks(path, chunk_rows):
+    if pyarrow is not None:
+        reader = pyarrow.csv.open_csv(
+            path,
+            read_options=pyarrow.csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            convert_options=pyarrow.csv.ConvertOptions(
+                include_columns=list(SIMULATION_COLUMNS),
+                column_types={
+                    "team_id": pyarrow.int64(),
+                    "team": pyarrow.string(),
+                    "simulation_run": pyarrow.int64(),
+                    "results": pyarrow.int64(),
+                },
+            ),
+        )
+        for batch in reader:
+            for chunk in _slices(batch, chunk_rows):
+                yield _arrow_chunk(chunk), None
+        return
+
+    file_size = os.path.getsize(path) or 1
+    with open(path, 'r', newline='') as file:
+        csv_reader = csv.reader(file)
+        header = next(csv_reader)
+        columns = [header.index(name) for name in SIMULATION_COLUMNS]
+        while True:
+            rows = list(itertools.islice(csv_reader, chunk_rows))
+            if not rows:
+                break
+            # Convert whole columns into preallocated arrays
+            team_id_column, team_column, run_column, results_column = columns
+            yield (
+                _int_column(rows, team_id_column),
+                list(map(operator.itemgetter(team_column), rows)),
+                _int_column(rows, run_column),
+                _int_column(rows, results_column),
+            ), file.buffer.tell() / file_size
+
+
+def _parquet_chunks(path, chunk_rows):
+    _require_pyarrow(path)
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    total_rows = parquet_file.metadata.num_rows or 1
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=list(SIMULATION_COLUMNS)):
+        rows += batch.num_rows
+        yield _arrow_chunk(batch), rows / total_rows
+
+
+def _arrow_chunks(path, chunk_rows):
+    _require_pyarrow(path)
+    with pyarrow.memory_map(path) as source:
+        try:
+            reader = pyarrow.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pyarrow.ArrowInvalid:
+            source.seek(0)
+            batches = pyarrow.ipc.open_stream(source)
+        for batch in batches:
+            for chunk in _slices(batch, chunk_rows):
+                yield _arrow_chunk(chunk), None
+
+
+def iter_simulation_chunks(path, chunk_rows=INGEST_CHUNK_ROWS):
+    """Yield ((team_ids, team_names, runs, results), progress) chunks of a simulations file
+
+    Integer columns are int64 arrays. progress is the fraction of the file
+    read so far, or None when the format does not tell.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    input_format = INPUT_FORMATS.get(extension)
+    if input_format == "csv":
+        return _csv_chunks(path, chunk_rows)
+    if input_format == "parquet":
+        return _parquet_chunks(path, chunk_rows)
+    if input_format == "arrow":
+        return _arrow_chunks(path, chunk_rows)
+    raise ValueError(f"Unsupported simulations file type: {extension}")
+
+
+def ingest_simulations(cursor, path, chunk_rows=INGEST_CHUNK_ROWS):
+    """Upsert teams and simulations from a CSV, Parquet or Arrow IPC file chunk by chunk
+
+    Each team keeps the name from its first row, as the original CSV loader
+    did. Returns (teams, rows) where teams maps team_id to name.
+
+    Each chunk goes into an unindexed temporary table first and is then
+    upserted with one INSERT ... SELECT in file order. This is about twice as
+    fast as upserting row by row and gives the same rows and IDs.
+    """
+    started = time.perf_counter()
+    teams = {}
+    rows = 0
+    cursor.execute(
+        'CREATE TEMP TABLE IF NOT EXISTS simulations_staging '
+        '(team_id INTEGER, simulation_run INTEGER, results INTEGER)'
+    )
+    for (team_ids, names, runs, results), progress in iter_simulation_chunks(path, chunk_rows):
+        _, first_rows = np.unique(team_ids, return_index=True)
+        for row in np.sort(first_rows).tolist():
+            teams.setdefault(int(team_ids[row]), names[row])
+
+        cursor.executemany(
+            'INSERT INTO simulations_staging VALUES (?, ?, ?)',
+            zip(team_ids.tolist(), runs.tolist(), results.tolist())
+        )
+        cursor.execute(
+            '''
+            INSERT INTO simulations (team_id, simulation_run, results)
+            SELECT team_id, simulation_run, results FROM simulations_staging WHERE true ORDER BY rowid
+            ON CONFLICT (team_id, simulation_run) DO UPDATE SET results = excluded.results
+            '''
+        )
+        cursor.execute('DELETE FROM simulations_staging')
+        rows += len(team_ids)
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        done = f", {progress:.0%}" if progress is not None else ""
+        print(f"   ⏳ {rows:,} rows{done} ({rate:,.0f} rows/s)")
+
+    cursor.execute('DROP TABLE simulations_staging')
+
+    cursor.executemany(
+        'INSERT INTO teams (id, name) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET name = excluded.name',
+        teams.items()
+    )
+    return teams, rows
+
+
+def append_simulation_runs(conn, team_id, runs, results):
+    """Insert new runs for one team in a single transaction and return the new data version
+
+    Nothing is written if any run number already exists for the team (the
+    unique index raises sqlite3.IntegrityError). The team is marked stale in
+    the matchup matrix rather than having its rows deleted, which would touch
+    every page of the table. If the rest of the matrix was current, it is
+    carried over to the new data version. team_score_counts is updated in
+    place and likewise carried over.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("SELECT value FROM metadata WHERE key = 'matchup_matrix_version'")
+        row = cursor.fetchone()
+        previous_version = read_data_version(cursor)
+        matrix_current = row is not None and int(row[0]) == previous_version
+        stats_current = team_stats_version(cursor) == previous_version
+
+        cursor.executemany(
+            "INSERT INTO simulations (team_id, simulation_run, results) VALUES (?, ?, ?)",
+            zip(itertools.repeat(team_id), runs, results)
+        )
+        data_version = bump_data_version(cursor)
+        cursor.execute("INSERT OR IGNORE INTO matchup_matrix_stale_teams (team_id) VALUES (?)", (team_id,))
+        if matrix_current:
+            cursor.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('matchup_matrix_version', ?)",
+                (str(data_version),)
+            )
+        if stats_current:
+            add_team_score_counts(cursor, team_id, results)
+            cursor.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('team_stats_version', ?)",
+                (str(data_version),)
+            )
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    return data_version
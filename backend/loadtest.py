@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmark import DATASETS, write_dataset
+
+BACKEND_DIR = Path(__file__).resolve().parent
+BUNDLED_DATA_DIR = BACKEND_DIR.parent / "data"
+
+# Relative weights of the request types each client draws from
+DEFAULT_MIX = "games=1,simulate_match=2,simulations=1"
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DURATION = 20.0
+DEFAULT_WARMUP = 3.0
+REQUEST_TIMEOUT = 30.0
+STARTUP_TIMEOUT = 120.0
+SEED = 1234
+
+
+def parse_mix(text):
+    """Parse "games=1,simulate_match=2" into {request type: weight}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in REQUEST_BUILDERS:
+            raise ValueError(f"Unknown request type {name!r}; expected one of {', '.join(REQUEST_BUILDERS)}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Weight for {name} must not be negative")
+    if not any(mix.values()):
+        raise ValueError("At least one request type needs a positive weight")
+    return mix
+
+
+def games_request(rng, teams, venues):
+    return "GET", "/api/games", {"params": {"limit": 100, "team_id": rng.choice(teams)}}
+
+
+def simulate_match_request(rng, teams, venues):
+    body = {"team_a": rng.choice(teams), "team_b": rng.choice(teams), "venue": rng.choice(venues)}
+    return "POST", "/api/simulations/simulate-match", {"json": body}
+
+
+def simulations_request(rng, teams, venues):
+    return "GET", "/api/simulations", {"params": {"limit": 1000, "team_id": rng.choice(teams)}}
+
+
+REQUEST_BUILDERS = {
+    "games": games_request,
+    "simulate_match": simulate_match_request,
+    "simulations": simulations_request,
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))]
+
+
+def summarize(records, seconds):
+    """Throughput, latency percentiles (ms, successful requests) and error counts
+
+    `records` are (latency seconds, status) pairs; status is the HTTP status
+    code, or the exception name when no response came back.
+    """
+    latencies = sorted(latency for latency, status in records if isinstance(status, int) and status < 400)
+    errors = len(records) - len(latencies)
+    statuses = {}
+    for _, status in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    stats = {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "throughput_rps": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+    if latencies:
+        stats.update({
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+        })
+    return stats
+
+
+async def run_client(client, rng, mix, teams, venues, measure_from, deadline, records):
+    """Issue requests back to back until the deadline, recording those started after warm-up"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, options = REQUEST_BUILDERS[name](rng, teams, venues)
+        start = loop.time()
+        try:
+            response = await client.request(method, path, **options)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError as error:
+            status = type(error).__name__
+        if start >= measure_from:
+            records[name].append((loop.time() - start, status))
+
+
+async def drive_load(base_url, mix, concurrency, duration, warmup=DEFAULT_WARMUP, seed=SEED, transport=None):
+    """Run `concurrency` clients against a server for warmup + duration seconds
+
+    Each client keeps one request in flight at a time and draws request
+    types by weight from `mix`. Only requests started after the warm-up are
+    reported, overall and per request type.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=REQUEST_TIMEOUT, transport=transport) as client:
+        teams = [team["id"] for team in (await client.get("/api/teams")).raise_for_status().json()]
+        venues = [venue["id"] for venue in (await client.get("/api/venues")).raise_for_status().json()]
+
+        records = {name: [] for name in mix}
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        deadline = measure_from + duration
+        await asyncio.gather(*(
+            run_client(client, random.Random(seed + index), mix, teams, venues, measure_from, deadline, records)
+            for index in range(concurrency)
+        ))
+        # In-flight requests finish after the deadline and still count
+        seconds = max(duration, loop.time() - measure_from)
+
+    return {
+        "overall": summarize([record for name in mix for record in records[name]], seconds),
+        "endpoints": {name: summarize(records[name], seconds) for name in mix},
+    }
+
+
+def dataset_env(backend_dir):
+    """Environment pointing PLUTODATA_DB at the prepared dataset's database"""
+    return {**os.environ, "PLUTODATA_DB": str(backend_dir / "plutodata.db")}
+
+
+@contextlib.contextmanager
+def prepared_dataset(name):
+    """A temporary backend directory with plutodata.db built from the bundled or a synthetic dataset"""
+    with tempfile.TemporaryDirectory(prefix=f"plutodata-load-{name}-") as root:
+        data_dir = Path(root) / "data"
+        if name == "bundled":
+            shutil.copytree(BUNDLED_DATA_DIR, data_dir)
+        else:
+            write_dataset(data_dir, **DATASETS[name])
+        backend_dir = Path(root) / "backend"
+        backend_dir.mkdir()
+        # setup_database resolves ../data from the cwd
+        subprocess.run(
+            [sys.executable, str(BACKEND_DIR / "setup_database.py")],
+            cwd=backend_dir, env=dataset_env(backend_dir), check=True, stdout=subprocess.DEVNULL,
+        )
+        yield backend_dir
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running_server(backend_dir, workers, port):
+    """Run uvicorn as start.sh does (without --reload) until the block exits"""
+    log_path = backend_dir / f"uvicorn-{workers}.log"
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND_DIR),
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--no-access-log",
+    ]
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            command, cwd=backend_dir, env=dataset_env(backend_dir), stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}", process, log_path)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def wait_until_ready(base_url, process, log_path, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}:\n{log_path.read_text()}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not answer within {timeout:.0f}s:\n{log_path.read_text()}")
+
+
+def print_run(label, run):
+    print(f"📈 {label}")
+    for name, stats in [("overall", run["overall"]), *run["endpoints"].items()]:
+        latency = (
+            f"p50 {stats['p50_ms']:>9.2f} ms   p95 {stats['p95_ms']:>9.2f} ms   p99 {stats['p99_ms']:>9.2f} ms"
+            if "p50_ms" in stats else "no successful requests"
+        )
+        print(f"   {name:<16} {stats['throughput_rps']:>9.1f} req/s   {latency}   errors {stats['error_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive concurrent HTTP traffic at the API and report latency percentiles")
+    parser.add_argument("--dataset", default="bundled", choices=["bundled", *DATASETS],
+                        help="Bundled ../data or one of the synthetic benchmark datasets")
+    parser.add_argument("--workers", default="1", help="Comma-separated uvicorn worker counts, one run each (e.g. 1,2,4)")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Request type weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=DEFAULT_WARMUP, help="Unmeasured seconds before each run")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "dataset": None if args.url else args.dataset,
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "seed": args.seed,
+        "runs": [],
+    }
+
+    def load(base_url):
+        return asyncio.run(drive_load(base_url, mix, args.concurrency, args.duration, args.warmup, args.seed))
+
+    if args.url:
+        print(f"🎯 Loading {args.url} with {args.concurrency} clients for {args.duration:.0f}s")
+        run = load(args.url)
+        report["runs"].append({"workers": None, **run})
+        print_run(args.url, run)
+    else:
+        print(f"🔧 Building the {args.dataset} dataset...")
+        with prepared_dataset(args.dataset) as backend_dir:
+            for workers in [int(count) for count in args.workers.split(",")]:
+                print(f"🚀 {workers} worker(s), {args.concurrency} clients for {args.duration:.0f}s")
+                with running_server(backend_dir, workers, free_port()) as base_url:
+                    run = load(base_url)
+                report["runs"].append({"workers": workers, **run})
+                print_run(f"{workers} worker(s)", run)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"✅ Report written to {args.output}")
@@ -1,11 +1,88 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 import uvicorn
+import json
+import math
+import secrets
 import sqlite3
+import threading
 
-app = FastAPI(title="PlutoData API", version="1.0.0")
+from matchup_engine import (
+    DEFAULT_CONFIDENCE,
+    DEFAULT_HISTOGRAM_BINS,
+    DEFAULT_QUANTILES,
+    DEFAULT_SAMPLES,
+    MAX_HISTOGRAM_BINS,
+    MAX_SAMPLES,
+    MAX_SWEEP_MULTIPLIERS,
+    break_even_multiplier,
+    match_outcomes_array,
+    matchup_histogram,
+    sample_matchup,
+    score_distribution,
+    simulate_matchup,
+    win_counts_at_multipliers,
+)
+from database import DATABASE_PATH, database
+from exports import EXPORT_MEDIA_TYPES, stream_matchup_outcomes, stream_simulation_rows
+from ingest import MAX_APPEND_RUNS, append_simulation_runs
+from matchup_batch import (
+    BATCH_STREAM_CHUNK_MATCHUPS,
+    MAX_BATCH_MATCHUPS,
+    evaluate_matchups,
+    iter_matchup_summaries,
+    shutdown_process_pool,
+)
+from matchup_matrix import matchup_matrix
+from matchup_stream import EVENT_STREAM_MEDIA_TYPE, MAX_STREAM_CHUNK_RUNS, STREAM_CHUNK_RUNS, iter_matchup_progress, sse_event
+from metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, metrics, render_stats, stage
+from migrations import migrate
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, page_rows
+from queries import games_query, simulations_query
+from result_cache import etag_matches, make_etag, result_cache
+from score_file import score_file_path
+from season_simulator import DEFAULT_FINALS_SPOTS, load_fixtures, simulate_season
+from serialization import FastJSONResponse, fast_response, negotiated_media_type
+from simulation_store import simulation_store
+from team_stats import quantile_label, team_stats
+
+app = FastAPI(title="PlutoData API", version="1.0.0", default_response_class=FastJSONResponse)
+
+# Server-Sent Events endpoints; an event stream is never answered with a 304
+EVENT_STREAM_PATHS = {"/api/simulations/simulate-match/stream"}
+
+# Conditional GET support (registered before CORS so CORS wraps the 304s too)
+@app.middleware("http")
+async def add_etag(request: Request, call_next):
+    """Answer conditional GETs for API data with 304 when the data has not changed
+
+    Every GET under /api/ (apart from /api/admin/ and event streams) is
+    determined by its URL and the loaded data version, so the ETag is
+    derived from those alone.
+    """
+    path = request.url.path
+    if (
+        request.method != "GET"
+        or not path.startswith("/api/")
+        or path.startswith("/api/admin/")
+        or path in EVENT_STREAM_PATHS
+    ):
+        return await call_next(request)
+    
+    etag = make_etag(simulation_store.data_version, path, request.url.query, negotiated_media_type(request))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        # A compressed body is not byte-identical to the uncompressed one
+        response.headers["ETag"] = f"W/{etag}" if "content-encoding" in response.headers else etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
 
 # CORS middleware configuration
 app.add_middleware(
@@ -14,14 +91,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
-# Database connection function
+# Request metrics (outermost, so the time spent in the other middleware counts too)
+app.add_middleware(MetricsMiddleware, router=app.router, metrics=metrics)
+
+# Database connection function (read-write, for writers only; reads go
+# through the pooled `database`)
 def get_db_connection():
-    conn = sqlite3.connect('plutodata.db')
+    conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name
     return conn
 
+def reload_simulation_store():
+    """Load the simulation store and the matching precomputed matchup matrix"""
+    with database.pool.connection() as conn:
+        simulation_store.load(conn, score_file_path(DATABASE_PATH))
+        matchup_matrix.load(conn, simulation_store.data_version)
+        team_stats.load(conn, simulation_store)
+    result_cache.clear()
+    usage = simulation_store.memory_usage()
+    print(
+        f"📦 Simulation store loaded: {usage['teams']} teams, "
+        f"{usage['simulation_runs']} runs, {usage['score_bytes']} bytes "
+        f"from {simulation_store.score_source}, "
+        f"{len(matchup_matrix.entries)} precomputed matchups"
+    )
+
+# Serializes run ingestion so the in-memory store sees commits in order
+ingest_lock = threading.Lock()
+
+def append_runs(team_id, runs, results):
+    """Store new runs for a team and fold them into the in-memory data
+
+    Matrix entries for the team are dropped and its statistics updated
+    before the store takes the new data version, so nothing cached or
+    tagged with that version predates the runs. If another worker process
+    has written runs since this one loaded, merging only these runs would
+    label incomplete data with the new version, so everything is reloaded
+    instead. Other workers see the runs on their next reload or ingest.
+    """
+    with ingest_lock:
+        conn = get_db_connection()
+        try:
+            data_version = append_simulation_runs(conn, team_id, runs, results)
+        finally:
+            conn.close()
+        invalidated = matchup_matrix.invalidate_team(
+            team_id, simulation_store.teams, simulation_store.venues, data_version
+        )
+        if data_version == simulation_store.data_version + 1:
+            team_stats.add_runs(team_id, results, data_version)
+            simulation_store.add_runs(team_id, results, data_version)
+        else:
+            reload_simulation_store()
+        total_runs = len(simulation_store.team_scores(team_id))
+    return {
+        "team_id": team_id,
+        "runs_added": len(runs),
+        "total_runs": total_runs,
+        "invalidated_matchups": invalidated,
+        "data_version": data_version,
+    }
+
+def get_simulation_store():
+    """Return the process-wide simulation store, loading it on first use"""
+    if not simulation_store.loaded:
+        reload_simulation_store()
+    return simulation_store
+
 # Pydantic models
 class Item(BaseModel):
     id: Optional[int] = None
@@ -60,6 +199,56 @@ class SimulationRequest(BaseModel):
     team_a: int
     team_b: int
     venue: int
+    # The raw per-pairing totals grow with N·M, so they are opt-in
+    include_match_outcomes: bool = False
+    distribution_bin_size: int = Field(10, gt=0)
+    # Side-by-side team histograms: fixed-width bins of `histogram_bin_size`
+    # points, or about `histogram_bins` equal-count bins with "quantile"
+    histogram_binning: Literal["fixed", "quantile"] = "fixed"
+    histogram_bin_size: int = Field(10, gt=0)
+    histogram_bins: int = Field(DEFAULT_HISTOGRAM_BINS, ge=1, le=MAX_HISTOGRAM_BINS)
+    # "sampled" estimates the win percentage from `samples` seeded random
+    # pairings, stopping early once the interval is `ci_width` points wide
+    mode: Literal["exact", "sampled"] = "exact"
+    samples: int = Field(DEFAULT_SAMPLES, ge=1, le=MAX_SAMPLES)
+    seed: int = Field(0, ge=0)
+    ci_width: Optional[float] = Field(None, gt=0)
+    confidence: float = Field(DEFAULT_CONFIDENCE, gt=0, lt=1)
+
+class BatchMatchup(BaseModel):
+    team_a: int
+    team_b: int
+    venue: int
+
+class BatchSimulationRequest(BaseModel):
+    matchups: List[BatchMatchup] = Field(..., min_length=1, max_length=MAX_BATCH_MATCHUPS)
+    # Send the summaries as NDJSON lines as they are computed
+    stream: bool = False
+
+class MultiplierSweepRequest(BaseModel):
+    team_a: int
+    team_b: int
+    # Explicit home multipliers, or else `steps` evenly spaced values from
+    # multiplier_min to multiplier_max
+    multipliers: Optional[List[float]] = Field(None, min_length=1, max_length=MAX_SWEEP_MULTIPLIERS)
+    multiplier_min: float = 0.8
+    multiplier_max: float = 1.4
+    steps: int = Field(61, ge=1, le=MAX_SWEEP_MULTIPLIERS)
+
+class SeasonSimulationRequest(BaseModel):
+    seasons: int = Field(10_000, ge=1, le=1_000_000)
+    # Omit for a random seed; the seed used is returned either way
+    seed: Optional[int] = Field(None, ge=0)
+    finals_spots: int = Field(DEFAULT_FINALS_SPOTS, ge=1)
+
+class SimulationRun(BaseModel):
+    simulation_run: int
+    # Scores are held as int32
+    results: int = Field(..., ge=0, le=2**31 - 1)
+
+class SimulationRunsRequest(BaseModel):
+    team_id: int
+    runs: List[SimulationRun] = Field(..., min_length=1, max_length=MAX_APPEND_RUNS)
 
 # In-memory storage (replace with database in production)
 items_db = []
@@ -70,6 +259,40 @@ item_id_counter = 1
 #  get team names B
 #  GET VENUES
 
+def cursor_headers(next_cursor):
+    """Response headers carrying the next-page cursor, if there is one"""
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+
+def histogram_options(binning, bin_size, bins):
+    """Keyword arguments for matchup_histogram"""
+    if binning == "quantile":
+        return {"binning": binning, "bins": bins}
+    return {"binning": binning, "bin_size": bin_size}
+
+def sampling_options(mode, samples, seed, ci_width, confidence):
+    """Keyword arguments for sample_matchup, or None in exact mode"""
+    if mode != "sampled":
+        return None
+    return {"samples": samples, "seed": seed, "target_ci_width": ci_width, "confidence": confidence}
+
+def migrate_database():
+    """Bring the database schema up to date before serving requests"""
+    conn = get_db_connection()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+@app.on_event("startup")
+async def load_simulation_store():
+    await run_in_threadpool(migrate_database)
+    await run_in_threadpool(reload_simulation_store)
+
+@app.on_event("shutdown")
+async def stop_process_pool():
+    shutdown_process_pool()
+    database.close()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -78,319 +301,568 @@ async def root():
 @app.get("/api/venues", response_model=List[Venue])
 async def get_venues():
     """Get all venues from the database"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, home_multiplier FROM venues ORDER BY name")
-        venues = cursor.fetchall()
-        return [
-            {
-                "id": venue["id"], 
-                "name": venue["name"], 
-                "home_multiplier": venue["home_multiplier"]
-            } 
-            for venue in venues
-        ]
-    finally:
-        conn.close()
+    store = get_simulation_store()
+    return list(store.venues.values())
 
 @app.get("/api/venues/{venue_id}", response_model=Venue)
 async def get_venue(venue_id: int):
     """Get a specific venue by ID"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, home_multiplier FROM venues WHERE id = ?", (venue_id,))
-        venue = cursor.fetchone()
-        if venue:
-            return {
-                "id": venue["id"], 
-                "name": venue["name"], 
-                "home_multiplier": venue["home_multiplier"]
-            }
-        raise HTTPException(status_code=404, detail="Venue not found")
-    finally:
-        conn.close()
+    store = get_simulation_store()
+    venue = store.venues.get(venue_id)
+    if venue:
+        return venue
+    raise HTTPException(status_code=404, detail="Venue not found")
 
 @app.get("/api/games")
-async def get_games():
-    """Get all historical games with simulated results and venue effects"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT g.home_team, g.away_team, g.date, g.venue_id, v.name as venue_name, v.home_multiplier
-            FROM games g
-            JOIN venues v ON g.venue_id = v.id
-            ORDER BY g.date DESC
-        """)
-        games = cursor.fetchall()
-        
-        # Get all teams for ID lookup
-        cursor.execute("SELECT id, name FROM teams")
-        teams = {team["name"]: team["id"] for team in cursor.fetchall()}
+async def get_games(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    venue_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    mode: Literal["exact", "sampled"] = "exact",
+    samples: int = Query(DEFAULT_SAMPLES, ge=1, le=MAX_SAMPLES),
+    seed: int = Query(0, ge=0),
+    ci_width: Optional[float] = Query(None, gt=0),
+    confidence: float = Query(DEFAULT_CONFIDENCE, gt=0, lt=1),
+):
+    """Get historical games with simulated results and venue effects
+
+    Games are ordered newest first. When `limit` is given, the cursor for the
+    next page is returned in the X-Next-Cursor header; pass it back as
+    `cursor` to continue. With mode=sampled, win percentages are estimated
+    from seeded samples and come with a confidence interval.
+    """
+    store = get_simulation_store()
+    sampling = sampling_options(mode, samples, seed, ci_width, confidence)
+    cache_key = (
+        "games", store.data_version, limit, cursor, venue_id, team_id, date_from, date_to,
+        tuple(sampling.items()) if sampling else None,
+    )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        games_with_simulations, next_cursor = cached
+        return fast_response(request, games_with_simulations, cursor_headers(next_cursor))
+    
+    after = decode_cursor(cursor, (str, int)) if cursor is not None else None
+    query, params = games_query(
+        venue_id, team_id, date_from, date_to, after, limit + 1 if limit is not None else None
+    )
+    
+    with stage("db_fetch"):
+        games = await database.fetch_all(query, params)
+    games, next_cursor = page_rows(games, limit, lambda game: [game["date"], game["id"]])
+    
+    # Compute each unique (home, away, venue) matchup once for the whole batch
+    matchup_keys = []
+    for game in games:
+        if game["home_team_id"] in store.teams and game["away_team_id"] in store.teams:
+            matchup_keys.append((game["home_team_id"], game["away_team_id"], game["venue_id"]))
+        else:
+            matchup_keys.append(None)
+    with stage("compute"):
+        matchups = await run_in_threadpool(
+            evaluate_matchups, store, [key for key in matchup_keys if key], matrix=matchup_matrix, sampling=sampling
+        )
+    
+    games_with_simulations = []
+    for game, matchup_key in zip(games, matchup_keys):
+        game_data = {
+            "home_team": game["home_team"],
+            "away_team": game["away_team"],
+            "date": game["date"],
+            "venue_id": game["venue_id"],
+            "venue_name": game["venue_name"],
+            "home_multiplier": game["home_multiplier"],
+        }
         
-        games_with_simulations = []
-        for game in games:
-            home_team_name = game["home_team"]
-            away_team_name = game["away_team"]
-            venue_multiplier = game["home_multiplier"]
-            
-            # Get team IDs
-            home_team_id = teams.get(home_team_name)
-            away_team_id = teams.get(away_team_name)
-            
-            if home_team_id is not None and away_team_id is not None:
-                # Get simulation data for both teams
-                cursor.execute("SELECT results FROM simulations WHERE team_id = ?", (home_team_id,))
-                home_simulations = [row[0] for row in cursor.fetchall()]
-                
-                cursor.execute("SELECT results FROM simulations WHERE team_id = ?", (away_team_id,))
-                away_simulations = [row[0] for row in cursor.fetchall()]
-                
-                # Calculate simulated results with venue effects
-                home_wins = 0
-                total_simulations = 0
-                home_scores = []
-                away_scores = []
-                
-                for home_score in home_simulations:
-                    for away_score in away_simulations:
-                        # Apply venue multiplier to home team
-                        adjusted_home_score = home_score * venue_multiplier
-                        adjusted_away_score = away_score
-                        
-                        home_scores.append(adjusted_home_score)
-                        away_scores.append(adjusted_away_score)
-                        
-                        total_simulations += 1
-                        if adjusted_home_score > adjusted_away_score:
-                            home_wins += 1
-                
-                # Calculate statistics
-                home_win_percentage = (home_wins / total_simulations * 100) if total_simulations > 0 else 0
-                avg_home_score = sum(home_scores) / len(home_scores) if home_scores else 0
-                avg_away_score = sum(away_scores) / len(away_scores) if away_scores else 0
-                
-                games_with_simulations.append({
-                    "home_team": home_team_name,
-                    "away_team": away_team_name,
-                    "date": game["date"],
-                    "venue_id": game["venue_id"],
-                    "venue_name": game["venue_name"],
-                    "home_multiplier": venue_multiplier,
-                    "simulated_home_score": round(avg_home_score, 1),
-                    "simulated_away_score": round(avg_away_score, 1),
-                    "home_win_percentage": round(home_win_percentage, 1),
-                    "total_simulations": total_simulations
-                })
-            else:
-                # Fallback for games without simulation data
-                games_with_simulations.append({
-                    "home_team": home_team_name,
-                    "away_team": away_team_name,
-                    "date": game["date"],
-                    "venue_id": game["venue_id"],
-                    "venue_name": game["venue_name"],
-                    "home_multiplier": venue_multiplier,
-                    "simulated_home_score": None,
-                    "simulated_away_score": None,
-                    "home_win_percentage": None,
-                    "total_simulations": 0
+        if matchup_key is not None:
+            matchup = matchups[matchup_key]
+            game_data.update({
+                "simulated_home_score": round(matchup["avg_home_score"], 1),
+                "simulated_away_score": round(matchup["avg_away_score"], 1),
+                "home_win_percentage": round(matchup["home_win_percentage"], 1),
+                "total_simulations": matchup["total_simulations"]
+            })
+            if sampling:
+                game_data.update({
+                    "home_win_ci_low": round(matchup["ci_low"], 1),
+                    "home_win_ci_high": round(matchup["ci_high"], 1),
+                    "samples": matchup["samples"],
                 })
-        
-        return games_with_simulations
-    finally:
-        conn.close()
+        else:
+            # Fallback for games without simulation data
+            game_data.update({
+                "simulated_home_score": None,
+                "simulated_away_score": None,
+                "home_win_percentage": None,
+                "total_simulations": 0
+            })
+        games_with_simulations.append(game_data)
+    
+    result_cache.set(cache_key, (games_with_simulations, next_cursor))
+    return fast_response(request, games_with_simulations, cursor_headers(next_cursor))
 
 @app.get("/api/teams", response_model=List[Team])
 async def get_teams():
     """Get all teams from the database"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM teams ORDER BY name")
-        teams = cursor.fetchall()
-        return [{"id": team["id"], "name": team["name"]} for team in teams]
-    finally:
-        conn.close()
+    store = get_simulation_store()
+    return [{"id": team_id, "name": name} for team_id, name in store.teams.items()]
+
+def parse_quantiles(quantiles):
+    """Requested quantiles, or the defaults; each must lie in [0, 1]"""
+    if not quantiles:
+        return DEFAULT_QUANTILES
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise HTTPException(status_code=400, detail="Quantiles must be between 0 and 1")
+    quantiles = list(dict.fromkeys(quantiles))
+    if len({quantile_label(q) for q in quantiles}) < len(quantiles):
+        raise HTTPException(status_code=400, detail="Quantiles are too close together to label apart")
+    return quantiles
+
+def describe_team(team_id, quantiles):
+    return {"team_id": team_id, "team": simulation_store.teams[team_id], **team_stats.get(team_id, simulation_store).describe(quantiles)}
+
+@app.get("/api/teams/stats")
+async def get_teams_stats(quantiles: Optional[List[float]] = Query(None)):
+    """Score statistics for every team from the materialized per-team summary
+
+    Pass `quantiles` (repeatable, in [0, 1]) to choose which are reported.
+    """
+    get_simulation_store()
+    quantiles = parse_quantiles(quantiles)
+    return [describe_team(team_id, quantiles) for team_id in simulation_store.teams]
+
+@app.get("/api/teams/{team_id}/stats")
+async def get_team_stats(team_id: int, quantiles: Optional[List[float]] = Query(None)):
+    """Runs, mean, standard deviation, min, max and quantiles of a team's scores"""
+    store = get_simulation_store()
+    if team_id not in store.teams:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return describe_team(team_id, parse_quantiles(quantiles))
 
 @app.get("/api/teams/{team_id}", response_model=Team)
 async def get_team(team_id: int):
     """Get a specific team by ID"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM teams WHERE id = ?", (team_id,))
-        team = cursor.fetchone()
-        if team:
-            return {"id": team["id"], "name": team["name"]}
+    store = get_simulation_store()
+    if team_id in store.teams:
+        return {"id": team_id, "name": store.teams[team_id]}
+    raise HTTPException(status_code=404, detail="Team not found")
+
+@app.get("/api/simulations/export")
+async def export_simulations(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    team_id: Optional[int] = None,
+):
+    """Stream the simulations table as NDJSON or CSV"""
+    return StreamingResponse(
+        stream_simulation_rows(database.pool, format, team_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="simulations.{format}"'},
+    )
+
+@app.get("/api/simulations/simulate-match/export")
+async def export_match_outcomes(
+    team_a: int,
+    team_b: int,
+    venue: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+):
+    """Stream every (home run, away run) outcome of a matchup as NDJSON or CSV"""
+    store = get_simulation_store()
+    venue_data = store.venues.get(venue)
+    if not venue_data:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    if team_a not in store.teams or team_b not in store.teams:
         raise HTTPException(status_code=404, detail="Team not found")
-    finally:
-        conn.close()
+    
+    return StreamingResponse(
+        stream_matchup_outcomes(
+            store.team_scores(team_a), store.team_scores(team_b), venue_data["home_multiplier"], format
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="outcomes_{team_a}_{team_b}_{venue}.{format}"'},
+    )
 
-@app.post("/api/simulations/simulate-match")
-async def simulate_match(simulation_request: SimulationRequest):
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        
-        # Get team A simulation results
-        cursor.execute("SELECT results FROM simulations WHERE team_id = ?", (simulation_request.team_a,))
-        team_a_results = [row[0] for row in cursor.fetchall()]
-        
-        # Get team B simulation results
-        cursor.execute("SELECT results FROM simulations WHERE team_id = ?", (simulation_request.team_b,))
-        team_b_results = [row[0] for row in cursor.fetchall()]
-        
-        # Get venue data
-        cursor.execute("SELECT name, home_multiplier FROM venues WHERE id = ?", (simulation_request.venue,))
-        venue_data = cursor.fetchone()
-        if not venue_data:
-            raise HTTPException(status_code=404, detail="Venue not found")
-        
-        venue_name, home_multiplier = venue_data
-        
-        # Get team names
-        cursor.execute("SELECT name FROM teams WHERE id = ?", (simulation_request.team_a,))
-        team_a_name = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT name FROM teams WHERE id = ?", (simulation_request.team_b,))
-        team_b_name = cursor.fetchone()[0]
-        
-        # Process simulation data (Team A is home team)
-        match_outcomes = []
-        home_team_scores = []
-        away_team_scores = []
-        home_wins = 0
-        total_simulations = 0
-        
-        for team_a_score in team_a_results:
-            for team_b_score in team_b_results:
-                # Apply home multiplier to team A (home team)
-                adjusted_team_a = team_a_score * home_multiplier
-                adjusted_team_b = team_b_score  # No multiplier for away team
-                
-                # Store individual team scores
-                home_team_scores.append(adjusted_team_a)
-                away_team_scores.append(adjusted_team_b)
-                
-                # Calculate total match score
-                total_score = adjusted_team_a + adjusted_team_b
-                match_outcomes.append(total_score)
-                
-                # Count home team wins
-                total_simulations += 1
-                if adjusted_team_a > adjusted_team_b:
-                    home_wins += 1
-        
-        # Calculate win percentage
-        home_win_percentage = (home_wins / total_simulations * 100) if total_simulations > 0 else 0
-        
-        # Generate histogram data for both teams
-        def generate_team_histogram(scores, team_name):
-            if not scores:
-                return []
-            
-            min_score = min(scores)
-            max_score = max(scores)
-            
-            # Create bins (10-point ranges)
-            bin_size = 10
-            bins = {}
-            
-            for score in scores:
-                bin_key = int(score // bin_size) * bin_size
-                bins[bin_key] = bins.get(bin_key, 0) + 1
-            
-            # Format for histogram
-            histogram_data = []
-            for i in range(int(min_score - (min_score % bin_size)), int(max_score + bin_size), bin_size):
-                range_label = f"{i}-{i + bin_size - 1}"
-                count = bins.get(i, 0)
-                histogram_data.append({"range": range_label, "count": count, "team": team_name})
-            
-            return histogram_data
-        
-        # Generate histograms for both teams
-        home_histogram = generate_team_histogram(home_team_scores, team_a_name)
-        away_histogram = generate_team_histogram(away_team_scores, team_b_name)
-        
-        # Combine histograms for side-by-side display
-        combined_histogram = []
-        all_ranges = set()
-        
-        # Collect all ranges
-        for item in home_histogram:
-            all_ranges.add(item["range"])
-        for item in away_histogram:
-            all_ranges.add(item["range"])
-        
-        # Create combined data
-        for range_label in sorted(all_ranges):
-            home_count = next((item["count"] for item in home_histogram if item["range"] == range_label), 0)
-            away_count = next((item["count"] for item in away_histogram if item["range"] == range_label), 0)
-            
-            combined_histogram.append({
-                "range": range_label,
-                "home_team": home_count,
-                "away_team": away_count
-            })
+@app.get("/api/simulations/simulate-match/stream")
+async def stream_match(
+    request: Request,
+    team_a: int,
+    team_b: int,
+    venue: int,
+    chunk_runs: int = Query(STREAM_CHUNK_RUNS, ge=1, le=MAX_STREAM_CHUNK_RUNS),
+    histogram_bin_size: int = Query(10, gt=0),
+):
+    """Server-Sent Events with the running result of a matchup
+
+    A "start" event is sent straight away, then a "progress" event after
+    each chunk of home runs with the running home win % and histogram. The
+    final "result" event is exact. Streaming stops when the client goes away.
+    """
+    store = get_simulation_store()
+    venue_data = store.venues.get(venue)
+    if not venue_data:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    team_a_name = store.teams.get(team_a)
+    team_b_name = store.teams.get(team_b)
+    if team_a_name is None or team_b_name is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+    home_scores = store.team_scores(team_a)
+    away_scores = store.team_scores(team_b)
+    progress = iter_matchup_progress(
+        home_scores, away_scores, venue_data["home_multiplier"], team_a_name, team_b_name,
+        store.team_value_counts(team_b), chunk_runs, histogram_bin_size,
+    )
 
-        return {
+    async def events():
+        yield sse_event("start", {
             "team_a": team_a_name,
             "team_b": team_b_name,
-            "venue": venue_name,
-            "home_multiplier": home_multiplier,
-            "match_outcomes": match_outcomes,
-            "histogram_data": combined_histogram,
-            "home_win_percentage": round(home_win_percentage, 1),
-            "total_simulations": total_simulations
+            "venue": venue_data["name"],
+            "home_multiplier": venue_data["home_multiplier"],
+            "total_runs": len(home_scores),
+            "away_runs": len(away_scores),
+        })
+        previous = None
+        # Each chunk is computed off the event loop; the event for a chunk is
+        # held back one step so the last one can be labelled "result"
+        async for update in iterate_in_threadpool(progress):
+            if await request.is_disconnected():
+                return
+            if previous is not None:
+                yield sse_event("progress", previous)
+            previous = update
+        if previous is not None:
+            yield sse_event("result", previous)
+
+    return StreamingResponse(
+        events(),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def build_match_summary(team_a_name, team_b_name, venue_name, home_multiplier,
+                        team_a_results, team_b_results, team_a_counts, team_b_counts,
+                        matchup, distribution_bin_size, histogram):
+    """Win percentage, score distribution and histograms for a home/away matchup"""
+    # Process simulation data (Team A is home team)
+    if matchup is None:
+        with stage("compute"):
+            matchup = simulate_matchup(team_a_results, team_b_results, home_multiplier, away_sorted=True)
+    total_simulations = matchup["total_simulations"]
+    home_win_percentage = matchup["home_win_percentage"]
+    
+    with stage("histogram"):
+        distribution = score_distribution(team_a_results, team_b_results, home_multiplier, distribution_bin_size)
+        
+        # Side-by-side histograms from each team's precomputed score counts
+        combined_histogram = matchup_histogram(
+            team_a_counts, team_b_counts, home_multiplier, team_a_name, team_b_name, **histogram
+        )
+
+    summary = {
+        "team_a": team_a_name,
+        "team_b": team_b_name,
+        "venue": venue_name,
+        "home_multiplier": home_multiplier,
+        "score_distribution": distribution,
+        "histogram_data": combined_histogram,
+        "home_win_percentage": round(home_win_percentage, 1),
+        "total_simulations": total_simulations
+    }
+    if "samples" in matchup:
+        summary["sampling"] = {
+            "samples": matchup["samples"],
+            "confidence": matchup["confidence"],
+            "ci_low": round(matchup["ci_low"], 2),
+            "ci_high": round(matchup["ci_high"], 2),
         }
-    finally:
-        conn.close()
+    return summary
+
+@app.post("/api/simulations/simulate-match")
+async def simulate_match(request: Request, simulation_request: SimulationRequest):
+    store = get_simulation_store()
+    
+    # Get venue data
+    venue = store.venues.get(simulation_request.venue)
+    if not venue:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    
+    venue_name = venue["name"]
+    home_multiplier = venue["home_multiplier"]
+    
+    # Get team names
+    team_a_name = store.teams.get(simulation_request.team_a)
+    team_b_name = store.teams.get(simulation_request.team_b)
+    if team_a_name is None or team_b_name is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    
+    # Get sorted simulation results for both teams
+    team_a_results = store.team_scores(simulation_request.team_a)
+    team_b_results = store.team_scores(simulation_request.team_b)
+    
+    sampling = sampling_options(
+        simulation_request.mode,
+        simulation_request.samples,
+        simulation_request.seed,
+        simulation_request.ci_width,
+        simulation_request.confidence,
+    )
+    if sampling and simulation_request.include_match_outcomes:
+        raise HTTPException(status_code=400, detail="include_match_outcomes is only available in exact mode")
+    histogram = histogram_options(
+        simulation_request.histogram_binning,
+        simulation_request.histogram_bin_size,
+        simulation_request.histogram_bins,
+    )
+    
+    cache_key = (
+        "simulate-match",
+        store.data_version,
+        simulation_request.team_a,
+        simulation_request.team_b,
+        simulation_request.venue,
+        simulation_request.distribution_bin_size,
+        tuple(histogram.items()),
+        tuple(sampling.items()) if sampling else None,
+    )
+    response = result_cache.get(cache_key)
+    if response is None:
+        with stage("compute"):
+            if sampling:
+                matchup = sample_matchup(team_a_results, team_b_results, home_multiplier, **sampling)
+            else:
+                matchup = matchup_matrix.get(
+                    simulation_request.team_a, simulation_request.team_b, simulation_request.venue, store.data_version
+                )
+        response = build_match_summary(
+            team_a_name, team_b_name, venue_name, home_multiplier,
+            team_a_results, team_b_results,
+            store.team_value_counts(simulation_request.team_a),
+            store.team_value_counts(simulation_request.team_b),
+            matchup, simulation_request.distribution_bin_size, histogram,
+        )
+        result_cache.set(cache_key, response)
+    
+    # The raw outcomes are too large to cache and are added per request; the
+    # array is serialized directly rather than as a list of Python floats
+    if simulation_request.include_match_outcomes:
+        with stage("compute"):
+            outcomes = match_outcomes_array(team_a_results, team_b_results, home_multiplier)
+        response = {**response, "match_outcomes": outcomes}
 
+    return fast_response(request, response)
 
-@app.get("/api/simulations", response_model=List[Simulation])
-async def get_simulations(team_id: Optional[int] = None, limit: int = 50):
-    """Get simulations with optional team filter"""
-    conn = get_db_connection()
+def sweep_multipliers(sweep_request):
+    """The multipliers a sweep request asks for, in request order
+
+    Non-finite values are rejected here rather than by the model, whose
+    validation errors would echo them back in a body JSON cannot hold.
+    """
+    if sweep_request.multipliers is not None:
+        requested = sweep_request.multipliers
+    else:
+        requested = [sweep_request.multiplier_min, sweep_request.multiplier_max]
+    if not all(math.isfinite(multiplier) for multiplier in requested):
+        raise HTTPException(status_code=400, detail="multipliers must be finite numbers")
+    if min(requested) < 0:
+        raise HTTPException(status_code=400, detail="multipliers must not be negative")
+    if sweep_request.multipliers is not None:
+        return sweep_request.multipliers
+    if sweep_request.multiplier_min > sweep_request.multiplier_max:
+        raise HTTPException(status_code=400, detail="multiplier_min must not exceed multiplier_max")
+    low, high, steps = sweep_request.multiplier_min, sweep_request.multiplier_max, sweep_request.steps
+    if steps == 1:
+        return [low]
+    return [round(low + (high - low) * step / (steps - 1), 6) for step in range(steps)]
+
+@app.post("/api/simulations/simulate-match/sweep")
+async def sweep_match(sweep_request: MultiplierSweepRequest):
+    """Home win percentage of a matchup across many home multipliers at once
+
+    Evaluates the requested multipliers and every venue's multiplier in one
+    pass over the two teams' score counts, and solves for the break-even
+    multiplier above which the home team wins at least half the pairings.
+    """
+    store = get_simulation_store()
+    if sweep_request.team_a not in store.teams or sweep_request.team_b not in store.teams:
+        raise HTTPException(status_code=404, detail="Team not found")
+    multipliers = sweep_multipliers(sweep_request)
+
+    cache_key = ("simulate-sweep", store.data_version, sweep_request.team_a, sweep_request.team_b, tuple(multipliers))
+    response = result_cache.get(cache_key)
+    if response is None:
+        home_counts = store.team_value_counts(sweep_request.team_a)
+        away_counts = store.team_value_counts(sweep_request.team_b)
+        venue_ids = sorted(store.venues)
+        venue_multipliers = [store.venues[venue_id]["home_multiplier"] for venue_id in venue_ids]
+        total_simulations = int(home_counts[1].sum()) * int(away_counts[1].sum())
+
+        with stage("compute"):
+            wins = win_counts_at_multipliers(home_counts, away_counts, [*multipliers, *venue_multipliers]).tolist()
+            break_even = break_even_multiplier(home_counts, away_counts)
+
+        def outcome(multiplier, home_wins):
+            percentage = home_wins / total_simulations * 100 if total_simulations else 0.0
+            return {"home_multiplier": multiplier, "home_wins": home_wins, "home_win_percentage": round(percentage, 2)}
+
+        response = {
+            "team_a": store.teams[sweep_request.team_a],
+            "team_b": store.teams[sweep_request.team_b],
+            "total_simulations": total_simulations,
+            "sweep": [outcome(multiplier, home_wins) for multiplier, home_wins in zip(multipliers, wins)],
+            "venues": [
+                {"venue_id": venue_id, "venue": store.venues[venue_id]["name"], **outcome(multiplier, home_wins)}
+                for venue_id, multiplier, home_wins in zip(venue_ids, venue_multipliers, wins[len(multipliers):])
+            ],
+            "break_even_multiplier": round(break_even, 4) if break_even is not None else None,
+        }
+        result_cache.set(cache_key, response)
+    return response
+
+@app.post("/api/simulations/simulate-batch")
+async def simulate_batch(batch_request: BatchSimulationRequest):
+    """Win percentage and average scores for many matchups in one call
+
+    Each team's runs come from the in-memory store, repeated matchups are
+    computed once and large batches are spread over the process pool.
+    Summaries are returned in request order.
+    """
+    store = get_simulation_store()
+    
+    matchup_keys = []
+    for matchup in batch_request.matchups:
+        if matchup.venue not in store.venues:
+            raise HTTPException(status_code=404, detail=f"Venue not found: {matchup.venue}")
+        for team_id in (matchup.team_a, matchup.team_b):
+            if team_id not in store.teams:
+                raise HTTPException(status_code=404, detail=f"Team not found: {team_id}")
+        matchup_keys.append((matchup.team_a, matchup.team_b, matchup.venue))
+    
+    if batch_request.stream:
+        summaries = iter_matchup_summaries(
+            store, matchup_keys, matrix=matchup_matrix, chunk_size=BATCH_STREAM_CHUNK_MATCHUPS
+        )
+        return StreamingResponse(
+            (json.dumps(summary) + "\n" for summary in summaries),
+            media_type=EXPORT_MEDIA_TYPES["ndjson"],
+        )
+    
+    with stage("compute"):
+        return await run_in_threadpool(
+            lambda: list(iter_matchup_summaries(store, matchup_keys, matrix=matchup_matrix))
+        )
+
+@app.post("/api/simulations/simulate-season")
+async def simulate_season_endpoint(season_request: SeasonSimulationRequest):
+    """Ladder-position and finals-qualification probabilities for the games fixture list
+
+    Each fixture's result is drawn from the two teams' simulation runs with
+    the venue's home multiplier applied. The same seed and season count
+    always give the same result.
+    """
+    store = get_simulation_store()
+    # A random seed is never asked for again, so only seeded results are cached
+    seeded = season_request.seed is not None
+    seed = season_request.seed if seeded else secrets.randbits(32)
+    
+    cache_key = ("simulate-season", store.data_version, season_request.seasons, seed, season_request.finals_spots)
+    result = result_cache.get(cache_key) if seeded else None
+    if result is None:
+        with stage("db_fetch"):
+            fixtures = await database.run(load_fixtures)
+        with stage("compute"):
+            result = await run_in_threadpool(
+                simulate_season, store, fixtures, season_request.seasons, seed, season_request.finals_spots
+            )
+        if seeded:
+            result_cache.set(cache_key, result)
+    return result
+
+@app.post("/api/simulations/runs", status_code=201)
+async def add_simulation_runs(runs_request: SimulationRunsRequest):
+    """Add new simulation runs for a team without reloading the data
+
+    The runs are written in one transaction and merged into the team's
+    sorted scores in memory. Run numbers must be new for the team.
+    """
+    store = get_simulation_store()
+    if runs_request.team_id not in store.teams:
+        raise HTTPException(status_code=404, detail="Team not found")
+    runs = [run.simulation_run for run in runs_request.runs]
+    results = [run.results for run in runs_request.runs]
+    
     try:
-        cursor = conn.cursor()
-        
-        if team_id:
-            query = """
-                SELECT s.id, s.team_id, s.simulation_run, s.results, t.name as team_name
-                FROM simulations s
-                JOIN teams t ON s.team_id = t.id
-                WHERE s.team_id = ?
-                ORDER BY s.simulation_run
-                LIMIT ?
-            """
-            cursor.execute(query, (team_id, limit))
-        else:
-            query = """
-                SELECT s.id, s.team_id, s.simulation_run, s.results, t.name as team_name
-                FROM simulations s
-                JOIN teams t ON s.team_id = t.id
-                ORDER BY t.name, s.simulation_run
-                LIMIT ?
-            """
-            cursor.execute(query, (limit,))
-        
-        simulations = cursor.fetchall()
-        return [
-            {
-                "id": sim["id"],
-                "team_id": sim["team_id"],
-                "simulation_run": sim["simulation_run"],
-                "results": sim["results"],
-                "team_name": sim["team_name"]
-            }
-            for sim in simulations
-        ]
-    finally:
-        conn.close()
+        with stage("db_write"):
+            return await run_in_threadpool(append_runs, runs_request.team_id, runs, results)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=409, detail="A simulation run number is repeated or already exists for this team")
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, stage, cache and connection pool metrics in Prometheus text format"""
+    db_stats = database.stats()
+    extra_lines = [
+        *render_stats("plutodata_result_cache", result_cache.stats()),
+        *render_stats("plutodata_db_executor", {k: v for k, v in db_stats.items() if k != "pool"}),
+        *render_stats("plutodata_db_pool", db_stats["pool"]),
+        *render_stats("plutodata_simulation_store", simulation_store.memory_usage()),
+    ]
+    return Response(metrics.render(extra_lines), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/api/admin/simulation-store")
+async def get_simulation_store_stats():
+    """Report what the in-memory simulation store holds"""
+    return get_simulation_store().memory_usage()
+
+@app.post("/api/admin/simulation-store/reload")
+async def reload_simulation_store_endpoint():
+    """Rebuild the simulation store, e.g. after setup_database.py has run"""
+    await run_in_threadpool(reload_simulation_store)
+    return simulation_store.memory_usage()
+
+@app.get("/api/admin/result-cache")
+async def get_result_cache_stats():
+    """Result cache hit, miss and eviction counters"""
+    return result_cache.stats()
+
+@app.get("/api/admin/db-pool")
+async def get_db_pool_stats():
+    """Connection pool saturation and wait-time counters"""
+    return database.stats()
+
+
+@app.get("/api/simulations", response_model=List[Simulation])
+async def get_simulations(
+    request: Request,
+    team_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    min_results: Optional[int] = None,
+    max_results: Optional[int] = None,
+):
+    """Get simulations with optional team and result-range filters
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Rows are serialized as selected, without per-row model validation.
+    """
+    if team_id is not None:
+        after = decode_cursor(cursor, (int,)) if cursor is not None else None
+        cursor_key = lambda sim: [sim["simulation_run"]]
+    else:
+        after = decode_cursor(cursor, (str, int)) if cursor is not None else None
+        cursor_key = lambda sim: [sim["team_name"], sim["simulation_run"]]
+    query, params = simulations_query(team_id, min_results, max_results, after, limit + 1)
+    
+    with stage("db_fetch"):
+        simulations = await database.fetch_all(query, params)
+    simulations, next_cursor = page_rows(simulations, limit, cursor_key)
+    
+    # The SELECT already has the Simulation fields, so rows go straight to JSON
+    return fast_response(request, [dict(sim) for sim in simulations], cursor_headers(next_cursor))
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from matchup_engine import sample_matchup, simulate_matchup
+
+# Below this many matchups to compute, pickling the score arrays over to
+# worker processes costs more than it saves
+PROCESS_POOL_MIN_MATCHUPS = 256
+PROCESS_POOL_WORKERS = os.cpu_count() or 1
+
+# Largest batch accepted in one request, and how many matchups each streamed
+# chunk evaluates
+MAX_BATCH_MATCHUPS = 10_000
+BATCH_STREAM_CHUNK_MATCHUPS = 1024
+
+_process_pool = None
+
+
+def get_process_pool():
+    """Process pool shared by batch computations, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes (they are recreated on next use)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+def _evaluate_chunk(chunk, sampling=None):
+    """Worker: compute every (key, home scores, away scores, multiplier) in a chunk
+
+    With `sampling` (keyword arguments for sample_matchup) each matchup is
+    estimated from sampled pairs instead of the full cross product.
+    """
+    if sampling is not None:
+        return [
+            (key, sample_matchup(home_scores, away_scores, home_multiplier, **sampling))
+            for key, home_scores, away_scores, home_multiplier in chunk
+        ]
+    return [
+        (key, simulate_matchup(home_scores, away_scores, home_multiplier, away_sorted=True))
+        for key, home_scores, away_scores, home_multiplier in chunk
+    ]
+
+
+def evaluate_matchups(store, matchups, matrix=None, use_process_pool=None, sampling=None):
+    """Compute statistics for (home_team_id, away_team_id, venue_id) triples
+
+    Duplicate triples are computed once and entries already in the
+    precomputed matrix are looked up rather than recomputed (the matrix is
+    exact, so it is skipped when `sampling` is given). Returns a dict keyed
+    by triple.
+    """
+    if sampling is not None:
+        matrix = None
+    results = {}
+    pending = []
+    for key in set(matchups):
+        home_team_id, away_team_id, venue_id = key
+        entry = matrix.get(home_team_id, away_team_id, venue_id, store.data_version) if matrix is not None else None
+        if entry is not None:
+            results[key] = entry
+            continue
+        pending.append((
+            key,
+            store.team_scores(home_team_id),
+            store.team_scores(away_team_id),
+            store.venues[venue_id]["home_multiplier"],
+        ))
+
+    if use_process_pool is None:
+        use_process_pool = len(pending) >= PROCESS_POOL_MIN_MATCHUPS
+
+    if use_process_pool and pending:
+        # One chunk per worker keeps the number of pickled messages small
+        chunk_size = -(-len(pending) // PROCESS_POOL_WORKERS)
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        for chunk_results in get_process_pool().map(partial(_evaluate_chunk, sampling=sampling), chunks):
+            results.update(chunk_results)
+    else:
+        results.update(_evaluate_chunk(pending, sampling))
+
+    return results
+
+
+def matchup_summary(key, matchup):
+    """Compact summary of one computed matchup, as returned by the batch endpoint"""
+    home_team_id, away_team_id, venue_id = key
+    return {
+        "team_a": home_team_id,
+        "team_b": away_team_id,
+        "venue": venue_id,
+        "home_win_percentage": round(matchup["home_win_percentage"], 1),
+        "avg_home_score": round(matchup["avg_home_score"], 1),
+        "avg_away_score": round(matchup["avg_away_score"], 1),
+        "total_simulations": matchup["total_simulations"],
+    }
+
+
+def iter_matchup_summaries(store, matchups, matrix=None, chunk_size=None):
+    """Yield a summary for every triple in matchups, in request order
+
+    With chunk_size set, the triples are evaluated that many at a time so the
+    first summaries are ready before the whole batch has been computed.
+    """
+    chunk_size = chunk_size or max(len(matchups), 1)
+    for start in range(0, len(matchups), chunk_size):
+        chunk = matchups[start:start + chunk_size]
+        results = evaluate_matchups(store, chunk, matrix=matrix)
+        for key in chunk:
+            yield matchup_summary(key, results[key])
@@ -0,0 +1,470 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+def as_scores(results):
+    """View simulation results as an integer array without copying typed arrays"""
+    scores = np.asarray(results)
+    if scores.dtype.kind != "i":
+        scores = scores.astype(np.int64)
+    return scores
+
+
+def prepare_scores(results):
+    """Convert a team's simulation results into a sorted integer array"""
+    return np.sort(as_scores(results))
+
+
+def count_home_wins(home_scores, sorted_away_scores, home_multiplier):
+    """Count (home, away) pairings where the adjusted home score is strictly higher
+
+    For every adjusted home score, searchsorted finds how many away scores are
+    strictly below it, so the pairwise cross product is never built.
+    """
+    adjusted_home = as_scores(home_scores) * home_multiplier
+    wins_per_home_score = np.searchsorted(sorted_away_scores, adjusted_home, side="left")
+    return int(wins_per_home_score.sum())
+
+
+def simulate_matchup(home_scores, away_scores, home_multiplier, away_sorted=False):
+    """Compute win and score statistics for a home team against an away team"""
+    home_scores = as_scores(home_scores)
+    away_scores = as_scores(away_scores) if away_sorted else prepare_scores(away_scores)
+
+    total_simulations = len(home_scores) * len(away_scores)
+    if total_simulations == 0:
+        return {
+            "home_wins": 0,
+            "total_simulations": 0,
+            "home_win_percentage": 0,
+            "avg_home_score": 0,
+            "avg_away_score": 0,
+        }
+
+    home_wins = count_home_wins(home_scores, away_scores, home_multiplier)
+    adjusted_home = home_scores * home_multiplier
+
+    # Every home score is paired with every away score, so the pairwise means
+    # reduce to the per-team means
+    return {
+        "home_wins": home_wins,
+        "total_simulations": total_simulations,
+        "home_win_percentage": home_wins / total_simulations * 100,
+        "avg_home_score": float(adjusted_home.mean()),
+        "avg_away_score": float(away_scores.mean()),
+    }
+
+
+# Multipliers x distinct home scores searched at once in win_counts_at_multipliers
+SWEEP_BLOCK_CELLS = 1_000_000
+MAX_SWEEP_MULTIPLIERS = 10_000
+# Distinct (home, away) score pairs above which a sweep searches per home score
+# instead of sorting every pair's threshold
+MAX_SWEEP_PAIRS = 4_000_000
+
+
+def win_thresholds(home_values, away_values):
+    """Smallest multiplier at which each positive home score beats each away score
+
+    Element [i, j] is the least float m with home_values[i] * m > away_values[j]
+    as computed in floating point, so comparing a multiplier against it agrees
+    exactly with the multiplication count_home_wins does, ties included.
+    """
+    home = home_values.astype(np.float64)[:, None]
+    away = away_values.astype(np.float64)[None, :]
+    thresholds = away / home
+    # The quotient is rounded, so step it to the exact boundary of home * m > away
+    while True:
+        short = home * thresholds <= away
+        if not short.any():
+            break
+        thresholds = np.where(short, np.nextafter(thresholds, np.inf), thresholds)
+    while True:
+        lower = np.nextafter(thresholds, -np.inf)
+        over = home * lower > away
+        if not over.any():
+            break
+        thresholds = np.where(over, lower, thresholds)
+    return thresholds
+
+
+def _threshold_win_counts(home_values, home_counts, away_values, away_counts, multipliers):
+    """Home wins at each multiplier from the sorted win thresholds of every score pair"""
+    thresholds = win_thresholds(home_values, away_values).ravel()
+    order = np.argsort(thresholds, kind="stable")
+    # reached[k] is the number of pairings among the k lowest thresholds
+    reached = np.concatenate(([0], np.cumsum(np.multiply.outer(home_counts, away_counts).ravel()[order])))
+    return reached[np.searchsorted(thresholds[order], multipliers, side="right")]
+
+
+def _searched_win_counts(home_values, home_counts, away_values, away_counts, multipliers):
+    """Home wins at each multiplier with one searchsorted per distinct home score"""
+    # away_below[j] is the number of away runs scoring below away_values[j]
+    away_below = np.concatenate(([0], np.cumsum(away_counts)))
+    wins = np.empty(len(multipliers), dtype=np.int64)
+    block = max(1, SWEEP_BLOCK_CELLS // max(1, len(home_values)))
+    for start in range(0, len(multipliers), block):
+        adjusted = np.multiply.outer(multipliers[start:start + block], home_values)
+        wins[start:start + block] = away_below[np.searchsorted(away_values, adjusted, side="left")] @ home_counts
+    return wins
+
+
+def win_counts_at_multipliers(home_value_counts, away_value_counts, multipliers):
+    """Home wins over every (home, away) pairing at each of several multipliers
+
+    A positive home score beats an away score once the multiplier reaches
+    their ratio, so the ratios of the P distinct score pairs are sorted once,
+    weighted by the pairings they stand for, and each of the K multipliers is
+    one searchsorted: O(N + M + (P + K) log P). Scores are bounded integers,
+    so P is far below N * M. Zero home scores, and sweeps over more than
+    MAX_SWEEP_PAIRS pairs, are searched per distinct home score instead.
+    Counts equal count_home_wins at every multiplier.
+    """
+    home_values, home_counts = (np.asarray(part, dtype=np.int64) for part in home_value_counts)
+    away_values, away_counts = (np.asarray(part, dtype=np.int64) for part in away_value_counts)
+    multipliers = np.asarray(multipliers, dtype=np.float64)
+
+    positive = home_values > 0
+    wins = np.zeros(len(multipliers), dtype=np.int64)
+    if not positive.all():
+        wins += _searched_win_counts(
+            home_values[~positive], home_counts[~positive], away_values, away_counts, multipliers
+        )
+    home_values, home_counts = home_values[positive], home_counts[positive]
+    if len(home_values) == 0 or len(away_values) == 0:
+        return wins
+    if len(home_values) * len(away_values) <= MAX_SWEEP_PAIRS:
+        return wins + _threshold_win_counts(home_values, home_counts, away_values, away_counts, multipliers)
+    return wins + _searched_win_counts(home_values, home_counts, away_values, away_counts, multipliers)
+
+
+def break_even_multiplier(home_value_counts, away_value_counts, target=0.5, iterations=100):
+    """Smallest multiplier above which the home team wins at least `target` of pairings
+
+    The count of pairings with away <= home * multiplier never decreases as
+    the multiplier grows, so it is bisected to the first pairing ratio that
+    reaches the target. Returns None when no multiplier does, e.g. when too
+    many home runs scored zero.
+    """
+    home_values, home_counts = (np.asarray(part, dtype=np.int64) for part in home_value_counts)
+    away_values, away_counts = (np.asarray(part, dtype=np.int64) for part in away_value_counts)
+    total = int(home_counts.sum()) * int(away_counts.sum())
+    # A zero home score loses at any multiplier
+    scoring = home_values > 0
+    home_values, home_counts = home_values[scoring], home_counts[scoring]
+    if total == 0 or len(home_values) == 0:
+        return None
+    # away_at_or_below[j] is the number of away runs scoring at most away_values[j - 1]
+    away_at_or_below = np.concatenate(([0], np.cumsum(away_counts)))
+
+    def pairings_reached(multiplier):
+        index = np.searchsorted(away_values, home_values * multiplier, side="right")
+        return int(away_at_or_below[index] @ home_counts)
+
+    needed = math.ceil(total * target)
+    # Every scoring home run beats every away run at the upper bound
+    low, high = 0.0, float(away_values[-1] + 1) / float(home_values[0])
+    if pairings_reached(high) < needed:
+        return None
+    if pairings_reached(low) >= needed:
+        return low
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if middle in (low, high):
+            break
+        if pairings_reached(middle) >= needed:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+# Pairs drawn per step of sample_matchup; the stopping rule is checked after each
+SAMPLE_BATCH = 10_000
+MAX_SAMPLES = 10_000_000
+DEFAULT_SAMPLES = 100_000
+DEFAULT_CONFIDENCE = 0.95
+
+
+def wilson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    """Wilson score interval for a binomial proportion, as (low, high) fractions"""
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+def sample_matchup(home_scores, away_scores, home_multiplier, samples, seed=0,
+                   target_ci_width=None, confidence=DEFAULT_CONFIDENCE):
+    """Estimate matchup statistics from `samples` randomly drawn (home, away) pairs
+
+    Pairs are drawn with replacement in batches of SAMPLE_BATCH from a
+    generator seeded with `seed`, so the same arguments always give the same
+    estimate. When `target_ci_width` (in percentage points) is given, drawing
+    stops as soon as the confidence interval on the win percentage is that
+    narrow. The cost depends on the sample budget, not on the run counts.
+    """
+    home_scores = as_scores(home_scores)
+    away_scores = as_scores(away_scores)
+    total_simulations = len(home_scores) * len(away_scores)
+    if total_simulations == 0 or samples == 0:
+        return {
+            "home_wins": 0,
+            "total_simulations": total_simulations,
+            "home_win_percentage": 0,
+            "avg_home_score": 0,
+            "avg_away_score": 0,
+            "samples": 0,
+            "ci_low": 0.0,
+            "ci_high": 100.0,
+            "confidence": confidence,
+        }
+
+    rng = np.random.default_rng(seed)
+    home_wins = 0
+    drawn = 0
+    home_sum = 0.0
+    away_sum = 0.0
+    while drawn < samples:
+        size = min(SAMPLE_BATCH, samples - drawn)
+        adjusted_home = home_scores[rng.integers(0, len(home_scores), size)] * home_multiplier
+        away = away_scores[rng.integers(0, len(away_scores), size)]
+        home_wins += int(np.count_nonzero(adjusted_home > away))
+        home_sum += float(adjusted_home.sum())
+        away_sum += float(away.sum())
+        drawn += size
+        ci_low, ci_high = wilson_interval(home_wins, drawn, confidence)
+        if target_ci_width is not None and (ci_high - ci_low) * 100 <= target_ci_width:
+            break
+
+    return {
+        "home_wins": home_wins,
+        "total_simulations": total_simulations,
+        "home_win_percentage": home_wins / drawn * 100,
+        "avg_home_score": home_sum / drawn,
+        "avg_away_score": away_sum / drawn,
+        "samples": drawn,
+        "ci_low": ci_low * 100,
+        "ci_high": ci_high * 100,
+        "confidence": confidence,
+    }
+
+
+def match_outcomes_array(home_scores, away_scores, home_multiplier):
+    """Total match score for every (home, away) pairing as a flat float64 array"""
+    adjusted_home = as_scores(home_scores) * home_multiplier
+    away_scores = as_scores(away_scores)
+    return np.add.outer(adjusted_home, away_scores).ravel()
+
+
+def match_outcomes(home_scores, away_scores, home_multiplier):
+    """Total match score for every (home, away) pairing, home-major order"""
+    return match_outcomes_array(home_scores, away_scores, home_multiplier).tolist()
+
+
+# Default number of bins when histograms are binned by quantile
+DEFAULT_HISTOGRAM_BINS = 10
+MAX_HISTOGRAM_BINS = 200
+
+
+def sorted_value_counts(sorted_scores):
+    """Distinct scores and how often each occurs, for an already sorted array"""
+    sorted_scores = as_scores(sorted_scores)
+    if len(sorted_scores) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.diff(sorted_scores)) + 1
+    starts = np.concatenate(([0], starts))
+    counts = np.diff(np.append(starts, len(sorted_scores)))
+    return sorted_scores[starts], counts
+
+
+def merge_value_counts(value_counts, other):
+    """Combine two (values, counts) pairs into one, values ascending"""
+    values = np.concatenate((value_counts[0], other[0]))
+    counts = np.concatenate((value_counts[1], other[1]))
+    merged_values, inverse = np.unique(values, return_inverse=True)
+    return merged_values, np.bincount(inverse, weights=counts, minlength=len(merged_values)).astype(np.int64)
+
+
+def quantile_edges(weighted_values, bins):
+    """Integer bin edges that split weighted scores into about `bins` equal-count bins
+
+    `weighted_values` is a sequence of (values, weights) pairs, pooled before
+    the quantiles are taken. The last edge is one past the largest floored
+    score. Tied scores never straddle an edge, so fewer bins can come back.
+    """
+    values = np.concatenate([np.asarray(v, dtype=np.float64) for v, _ in weighted_values])
+    weights = np.concatenate([np.asarray(w, dtype=np.float64) for _, w in weighted_values])
+    if len(values) == 0 or weights.sum() == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.argsort(values, kind="stable")
+    floored = np.floor(values[order]).astype(np.int64)
+    cumulative = np.cumsum(weights[order])
+    targets = cumulative[-1] * np.arange(1, bins) / bins
+    cuts = floored[np.searchsorted(cumulative, targets, side="right")]
+    return np.unique(np.concatenate(([floored[0]], cuts, [floored[-1] + 1])))
+
+
+def histogram_from_counts(values, counts, weight, team_name, bin_size=10, edges=None):
+    """Histogram of distinct scores `values` occurring `counts` times, each scaled by `weight`
+
+    Bins are `bin_size` points wide, or follow `edges` (see quantile_edges).
+    Cost depends on the number of distinct scores, not on the run count.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.int64)
+    if len(values) == 0 or weight == 0:
+        return []
+
+    floored = np.floor(values).astype(np.int64)
+    if edges is None:
+        bin_starts = np.floor_divide(floored, bin_size) * bin_size
+        first_bin = int(bin_starts.min())
+        bin_counts = np.bincount((bin_starts - first_bin) // bin_size, weights=counts)
+        starts = first_bin + bin_size * np.arange(len(bin_counts))
+        ends = starts + bin_size - 1
+    else:
+        bins = np.searchsorted(edges[:-1], floored, side="right") - 1
+        bin_counts = np.bincount(bins, weights=counts, minlength=len(edges) - 1)
+        starts = edges[:-1]
+        ends = edges[1:] - 1
+
+    return [
+        {"range": f"{start}-{end}", "count": count * weight, "team": team_name}
+        for start, end, count in zip(starts.tolist(), ends.tolist(), bin_counts.astype(np.int64).tolist())
+    ]
+
+
+def generate_team_histogram(scores, weight, team_name, bin_size=10):
+    """Histogram of a team's scores where each score occurs `weight` times
+
+    The home team's scores appear once per away run in the cross product (and
+    vice versa), so the pairwise histogram is the per-team histogram scaled by
+    the opponent's run count.
+    """
+    values, counts = np.unique(np.asarray(scores, dtype=np.float64), return_counts=True)
+    return histogram_from_counts(values, counts, weight, team_name, bin_size)
+
+
+def _range_start(range_label):
+    """Numeric start of a "start-end" range label"""
+    return int(range_label[:range_label.index("-", 1)])
+
+
+def combine_histograms(home_histogram, away_histogram):
+    """Combine home and away histograms for side-by-side display, in score order"""
+    home_counts = {item["range"]: item["count"] for item in home_histogram}
+    away_counts = {item["range"]: item["count"] for item in away_histogram}
+
+    combined_histogram = []
+    for range_label in sorted(home_counts.keys() | away_counts.keys(), key=_range_start):
+        combined_histogram.append({
+            "range": range_label,
+            "home_team": home_counts.get(range_label, 0),
+            "away_team": away_counts.get(range_label, 0)
+        })
+
+    return combined_histogram
+
+
+def matchup_histogram(home_value_counts, away_value_counts, home_multiplier, home_name, away_name,
+                      bin_size=10, binning="fixed", bins=DEFAULT_HISTOGRAM_BINS):
+    """Side-by-side histogram of a matchup from each team's (values, counts)
+
+    Home scores are scaled by the multiplier and weighted by the away run
+    count, and vice versa. With binning="quantile" both teams share about
+    `bins` bins holding equal shares of the pooled scores.
+    """
+    home_values, home_counts = home_value_counts
+    away_values, away_counts = away_value_counts
+    home_values = np.asarray(home_values, dtype=np.float64) * home_multiplier
+    home_weight = int(np.sum(away_counts))
+    away_weight = int(np.sum(home_counts))
+
+    edges = None
+    if binning == "quantile":
+        edges = quantile_edges(
+            [(home_values, np.asarray(home_counts) * home_weight), (away_values, np.asarray(away_counts) * away_weight)],
+            bins,
+        )
+        if len(edges) == 0:
+            return []
+
+    home_histogram = histogram_from_counts(home_values, home_counts, home_weight, home_name, bin_size, edges)
+    away_histogram = histogram_from_counts(away_values, away_counts, away_weight, away_name, bin_size, edges)
+    return combine_histograms(home_histogram, away_histogram)
+
+
+# Above this many points in both supports the direct convolution is slower
+# than going through the FFT
+FFT_MIN_SUPPORT = 256
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def convolve_counts(counts_a, counts_b):
+    """Convolve two integer count arrays, using the FFT for large supports"""
+    if min(len(counts_a), len(counts_b)) < FFT_MIN_SUPPORT:
+        return np.convolve(counts_a, counts_b)
+
+    size = len(counts_a) + len(counts_b) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    spectrum = np.fft.rfft(counts_a, fft_size) * np.fft.rfft(counts_b, fft_size)
+    return np.rint(np.fft.irfft(spectrum, fft_size)[:size]).astype(np.int64)
+
+
+def score_distribution(home_scores, away_scores, home_multiplier, bin_size=10, quantiles=DEFAULT_QUANTILES):
+    """Binned distribution of total match scores without enumerating pairings
+
+    Away scores are integers, so floor(home * multiplier + away) equals
+    floor(home * multiplier) + away. Convolving the floored home histogram with
+    the away histogram therefore gives the exact count of every integer total,
+    which is then regrouped into `bin_size` bins.
+    """
+    adjusted_home = as_scores(home_scores) * home_multiplier
+    away_scores = as_scores(away_scores)
+    if len(adjusted_home) == 0 or len(away_scores) == 0:
+        return {"bin_size": bin_size, "total": 0, "mean": None, "bins": [], "quantiles": {}}
+
+    home_floor = np.floor(adjusted_home).astype(np.int64)
+    home_min = int(home_floor.min())
+    away_min = int(away_scores.min())
+    home_counts = np.bincount(home_floor - home_min)
+    away_counts = np.bincount(away_scores - away_min)
+
+    # total_counts[i] is the number of pairings whose total floors to total_min + i
+    total_counts = convolve_counts(home_counts, away_counts)
+    total_min = home_min + away_min
+    total = len(adjusted_home) * len(away_scores)
+
+    totals = np.arange(total_min, total_min + len(total_counts))
+    bin_starts = np.floor_divide(totals, bin_size) * bin_size
+    first_bin = int(bin_starts[0])
+    binned_counts = np.bincount((bin_starts - first_bin) // bin_size, weights=total_counts).astype(np.int64)
+
+    bins = []
+    for offset, count in enumerate(binned_counts.tolist()):
+        start = first_bin + offset * bin_size
+        bins.append({"range": f"{start}-{start + bin_size - 1}", "count": count})
+
+    # Quantiles are resolved to the integer total they fall in
+    cumulative = np.cumsum(total_counts)
+    quantile_values = {}
+    for q in quantiles:
+        index = int(np.searchsorted(cumulative, q * total, side="left"))
+        quantile_values[f"p{round(q * 100):02d}"] = total_min + min(index, len(cumulative) - 1)
+
+    return {
+        "bin_size": bin_size,
+        "total": total,
+        "mean": round(float(adjusted_home.mean() + away_scores.mean()), 1),
+        "bins": bins,
+        "quantiles": quantile_values,
+    }
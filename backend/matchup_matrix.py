@@ -0,0 +1,225 @@
+import sqlite3
+
+import numpy as np
+
+from data_version import read_data_version
+from database import DATABASE_PATH
+from matchup_engine import simulate_matchup
+from score_file import score_file_path
+from simulation_store import SimulationStore
+
+
+# Largest score grid (in points) the histogram method will allocate per team
+MAX_SCORE_GRID = 1 << 16
+
+
+def _pairwise_matchup_matrix(store):
+    """Yield matrix rows by evaluating each (home, away, venue) triple separately"""
+    for venue_id, venue in store.venues.items():
+        home_multiplier = venue["home_multiplier"]
+        for home_team_id in store.teams:
+            home_scores = store.team_scores(home_team_id)
+            for away_team_id in store.teams:
+                matchup = simulate_matchup(
+                    home_scores, store.team_scores(away_team_id), home_multiplier, away_sorted=True
+                )
+                yield (
+                    home_team_id,
+                    away_team_id,
+                    venue_id,
+                    matchup["home_win_percentage"],
+                    matchup["avg_home_score"],
+                    matchup["avg_away_score"],
+                    matchup["total_simulations"],
+                )
+
+
+def compute_matchup_matrix(store):
+    """Yield a matrix row for every (home, away, venue) combination in the store
+
+    Away scores are integers, so an away score b loses to an adjusted home
+    score h exactly when b <= ceil(h) - 1. Per venue, the home wins for all
+    pairs of teams are then one product of a (teams x points) histogram of
+    ceil(h) - 1 with a (points x teams) cumulative count of away scores.
+    """
+    team_ids = list(store.teams)
+    team_scores = [store.team_scores(team_id) for team_id in team_ids]
+    if not team_ids or not store.venues:
+        return
+
+    max_multiplier = max(max(venue["home_multiplier"] for venue in store.venues.values()), 1.0)
+    populated = [scores for scores in team_scores if len(scores)]
+    if populated:
+        # Multipliers lie in [0, max_multiplier] with max_multiplier >= 1, so
+        # every raw and adjusted score falls inside these bounds
+        min_score = min(int(scores[0]) for scores in populated)
+        max_score = max(int(scores[-1]) for scores in populated)
+        low = int(np.floor(min(min_score * max_multiplier, 0))) - 1
+        high = int(np.ceil(max(max_score * max_multiplier, 0))) + 1
+    else:
+        low, high = 0, 0
+    if high - low > MAX_SCORE_GRID or min(venue["home_multiplier"] for venue in store.venues.values()) < 0:
+        yield from _pairwise_matchup_matrix(store)
+        return
+
+    grid_size = high - low + 1
+    run_counts = np.array([len(scores) for scores in team_scores], dtype=np.float64)
+    away_means = [float(scores.mean()) if len(scores) else 0 for scores in team_scores]
+
+    # away_cdf[x, j] = number of team j's scores <= low + x
+    away_cdf = np.zeros((grid_size, len(team_ids)))
+    for j, scores in enumerate(team_scores):
+        away_cdf[:, j] = np.cumsum(np.bincount(scores - low, minlength=grid_size))
+
+    for venue_id, venue in store.venues.items():
+        home_multiplier = venue["home_multiplier"]
+
+        # home_hist[i, x] = number of team i's runs with ceil(adjusted) - 1 == low + x
+        home_hist = np.zeros((len(team_ids), grid_size))
+        home_means = []
+        for i, scores in enumerate(team_scores):
+            adjusted = scores * home_multiplier
+            beaten = np.ceil(adjusted).astype(np.int64) - 1
+            home_hist[i] = np.bincount(beaten - low, minlength=grid_size)
+            home_means.append(float(adjusted.mean()) if len(scores) else 0)
+
+        home_wins = np.rint(home_hist @ away_cdf).astype(np.int64)
+        totals = np.outer(run_counts, run_counts).astype(np.int64)
+
+        for i, home_team_id in enumerate(team_ids):
+            for j, away_team_id in enumerate(team_ids):
+                total = int(totals[i, j])
+                if total:
+                    yield (
+                        home_team_id,
+                        away_team_id,
+                        venue_id,
+                        int(home_wins[i, j]) / total * 100,
+                        home_means[i],
+                        away_means[j],
+                        total,
+                    )
+                else:
+                    yield (home_team_id, away_team_id, venue_id, 0, 0, 0, 0)
+
+
+def build_matchup_matrix(conn, score_path=None):
+    """Batch job: rebuild the matchup_matrix table for the current data version"""
+    store = SimulationStore()
+    store.load(conn, score_path)
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM matchup_matrix")
+    cursor.execute("DELETE FROM matchup_matrix_stale_teams")
+    cursor.executemany(
+        """
+        INSERT INTO matchup_matrix (
+            home_team_id, away_team_id, venue_id,
+            home_win_percentage, avg_home_score, avg_away_score, total_simulations
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        compute_matchup_matrix(store)
+    )
+    cursor.execute(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('matchup_matrix_version', ?)",
+        (str(store.data_version),)
+    )
+    conn.commit()
+
+    cursor.execute("SELECT COUNT(*) FROM matchup_matrix")
+    return cursor.fetchone()[0]
+
+
+def matchup_matrix_is_complete(conn):
+    """Whether the stored matrix is for the current data and has every matchup"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT value FROM metadata WHERE key = 'matchup_matrix_version'")
+        row = cursor.fetchone()
+        if row is None or int(row[0]) != read_data_version(cursor):
+            return False
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM matchup_matrix_stale_teams)")
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute("SELECT COUNT(*) FROM matchup_matrix")
+        (entries,) = cursor.fetchone()
+    except sqlite3.OperationalError:
+        return False
+    cursor.execute("SELECT (SELECT COUNT(*) FROM teams), (SELECT COUNT(*) FROM venues)")
+    teams, venues = cursor.fetchone()
+    return entries == teams * teams * venues
+
+
+class MatchupMatrix:
+    """In-memory cache of the matchup_matrix table for one data version"""
+
+    def __init__(self):
+        self.entries = {}
+        self.data_version = None
+
+    def load(self, conn, data_version):
+        """Load the stored matrix, or nothing if it was built for other data"""
+        cursor = conn.cursor()
+        entries = {}
+        try:
+            cursor.execute("SELECT value FROM metadata WHERE key = 'matchup_matrix_version'")
+            row = cursor.fetchone()
+            if row and int(row[0]) == data_version:
+                # Matchups of teams whose runs changed since the build are left out
+                cursor.execute("""
+                    SELECT home_team_id, away_team_id, venue_id,
+                           home_win_percentage, avg_home_score, avg_away_score, total_simulations
+                    FROM matchup_matrix
+                    WHERE home_team_id NOT IN (SELECT team_id FROM matchup_matrix_stale_teams)
+                      AND away_team_id NOT IN (SELECT team_id FROM matchup_matrix_stale_teams)
+                """)
+                for home_team_id, away_team_id, venue_id, win_percentage, avg_home, avg_away, total in cursor:
+                    entries[(home_team_id, away_team_id, venue_id)] = {
+                        "home_win_percentage": win_percentage,
+                        "avg_home_score": avg_home,
+                        "avg_away_score": avg_away,
+                        "total_simulations": total,
+                    }
+        except sqlite3.OperationalError:
+            # Database predates the matchup matrix
+            pass
+
+        self.entries = entries
+        self.data_version = data_version
+
+    def get(self, home_team_id, away_team_id, venue_id, data_version=None):
+        """Precomputed matchup statistics, or None if the entry is missing
+
+        With `data_version`, nothing is returned unless the matrix is for
+        that version, e.g. while a reload has swapped in the store but not
+        yet the matrix.
+        """
+        if data_version is not None and data_version != self.data_version:
+            return None
+        return self.entries.get((home_team_id, away_team_id, venue_id))
+
+    def invalidate_team(self, team_id, team_ids, venue_ids, data_version):
+        """Drop the entries involving a team whose runs changed
+
+        Only the 2 x teams x venues keys that can involve the team are
+        touched. The remaining entries stay valid for `data_version`; the
+        dropped matchups are computed on demand. Returns the number dropped.
+        """
+        dropped = 0
+        for other_team_id in team_ids:
+            for venue_id in venue_ids:
+                dropped += self.entries.pop((team_id, other_team_id, venue_id), None) is not None
+                dropped += self.entries.pop((other_team_id, team_id, venue_id), None) is not None
+        self.data_version = data_version
+        return dropped
+
+
+# Process-wide matrix shared by all request handlers
+matchup_matrix = MatchupMatrix()
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DATABASE_PATH)
+    entries = build_matchup_matrix(conn, score_file_path(DATABASE_PATH))
+    print(f"🧮 Built matchup matrix with {entries} entries")
+    conn.close()
@@ -0,0 +1,67 @@
+import numpy as np
+
+from matchup_engine import as_scores, count_home_wins, matchup_histogram, merge_value_counts, sorted_value_counts
+from serialization import dumps_json
+
+# Home runs evaluated between two progress events; small enough that the
+# first event goes out within a few milliseconds at any dataset size
+STREAM_CHUNK_RUNS = 4096
+MAX_STREAM_CHUNK_RUNS = 1_000_000
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+def stratified_chunks(sorted_scores, chunk_runs=STREAM_CHUNK_RUNS):
+    """Split sorted scores into interleaved chunks of at most chunk_runs runs
+
+    Chunk k holds every n-th score starting at index k, so each chunk spans
+    the whole distribution and the running estimate is unbiased from the
+    first chunk on. Each chunk is itself sorted and together they cover
+    every run exactly once.
+    """
+    sorted_scores = as_scores(sorted_scores)
+    num_chunks = max(1, -(-len(sorted_scores) // chunk_runs))
+    for start in range(min(num_chunks, len(sorted_scores))):
+        yield sorted_scores[start::num_chunks]
+
+
+def iter_matchup_progress(home_scores, away_scores, home_multiplier, home_name, away_name,
+                          away_value_counts=None, chunk_runs=STREAM_CHUNK_RUNS, bin_size=10):
+    """Yield the running result of a matchup after each chunk of home runs
+
+    Every event covers the home runs seen so far against all away runs: the
+    home win percentage of those pairings and their side-by-side histogram.
+    The last event is the exact result over the full cross product. A home
+    team without runs still gets one (empty) event, so there is always a
+    final result.
+    """
+    home_scores = as_scores(home_scores)
+    away_scores = as_scores(away_scores)
+    if away_value_counts is None:
+        away_value_counts = sorted_value_counts(away_scores)
+    total_runs = len(home_scores)
+    processed_runs = 0
+    home_wins = 0
+    home_value_counts = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    # No home runs means no chunks; one empty chunk gives the final result
+    chunks = stratified_chunks(home_scores, chunk_runs) if total_runs else [home_scores]
+    for chunk in chunks:
+        home_wins += count_home_wins(chunk, away_scores, home_multiplier)
+        processed_runs += len(chunk)
+        home_value_counts = merge_value_counts(home_value_counts, sorted_value_counts(chunk))
+        pairings = processed_runs * len(away_scores)
+        yield {
+            "processed_runs": processed_runs,
+            "total_runs": total_runs,
+            "home_wins": home_wins,
+            "home_win_percentage": round(home_wins / pairings * 100, 2) if pairings else 0.0,
+            "histogram_data": matchup_histogram(
+                home_value_counts, away_value_counts, home_multiplier, home_name, away_name, bin_size
+            ),
+        }
+
+
+def sse_event(event, data):
+    """Encode one Server-Sent Event with a JSON payload"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps_json(data) + b"\n\n"
@@ -0,0 +1,224 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+# Resolved route labels remembered per (method, path) before the memo is reset
+ROUTE_LABEL_CACHE_SIZE = 4096
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels((*self.label_names, "le"), (*label_values, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, label_values, amount):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+def render_stats(prefix, stats):
+    """Render the numeric fields of a stats() dict as Prometheus gauges"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"# TYPE {prefix}_{key} gauge")
+        lines.append(f"{prefix}_{key} {_format_value(value)}")
+    return lines
+
+
+# Stage timings of the request being handled, collected by MetricsMiddleware
+_request_spans = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as an internal stage (e.g. "db_fetch") of the current request
+
+    Outside a request the block runs untimed.
+    """
+    spans = _request_spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - start))
+
+
+class Metrics:
+    """Per-route request metrics and per-stage timings"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "plutodata_http_request_duration_seconds",
+            "Time from request start to the last response byte",
+            ("method", "route", "status"),
+        )
+        self.requests_in_flight = Gauge(
+            "plutodata_http_requests_in_flight",
+            "Requests currently being handled",
+            ("method", "route"),
+        )
+        self.response_size = Histogram(
+            "plutodata_http_response_size_bytes",
+            "Response body size",
+            ("method", "route"),
+            SIZE_BUCKETS,
+        )
+        self.stage_duration = Histogram(
+            "plutodata_stage_duration_seconds",
+            "Time spent in internal request stages",
+            ("route", "stage"),
+        )
+
+    def render(self, extra_lines=()):
+        lines = []
+        for metric in (self.request_duration, self.requests_in_flight, self.response_size, self.stage_duration):
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight count, response size and stages per route
+
+    Requests are labelled with the route's path template (e.g.
+    /api/teams/{team_id}) so the number of series stays bounded. Streaming
+    responses are measured until their last chunk is sent.
+    """
+
+    def __init__(self, app, router, metrics):
+        self.app = app
+        self.router = router
+        self.metrics = metrics
+        self._route_labels = {}
+
+    def route_label(self, scope):
+        key = (scope["method"], scope["path"])
+        label = self._route_labels.get(key)
+        if label is None:
+            if len(self._route_labels) >= ROUTE_LABEL_CACHE_SIZE:
+                self._route_labels.clear()
+            label = self._route_labels[key] = self._match_route(scope)
+        return label
+
+    def _match_route(self, scope):
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_label(scope)
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        spans = []
+        token = _request_spans.set(spans)
+        self.metrics.requests_in_flight.add((method, route), 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.requests_in_flight.add((method, route), -1)
+            _request_spans.reset(token)
+            self.metrics.request_duration.observe((method, route, str(status)), elapsed)
+            self.metrics.response_size.observe((method, route), size)
+            for name, seconds in spans:
+                self.metrics.stage_duration.observe((route, name), seconds)
+
+
+# Process-wide metrics shared by all request handlers
+metrics = Metrics()
@@ -0,0 +1,283 @@
+import sqlite3
+import sys
+
+from database import DATABASE_PATH
+from queries import SIMULATION_SCORES_QUERY, games_query, simulations_query
+
+# The schema version is kept in SQLite's built-in user_version header field
+
+
+def create_base_tables(cursor):
+    """Teams, venues, simulations and games as originally created"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS venues (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            home_multiplier REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS simulations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER NOT NULL,
+            simulation_run INTEGER NOT NULL,
+            results INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (team_id) REFERENCES teams (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            home_team TEXT NOT NULL,
+            away_team TEXT NOT NULL,
+            date TEXT NOT NULL,
+            venue_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (venue_id) REFERENCES venues (id)
+        )
+    ''')
+
+
+def create_metadata_and_matchup_matrix(cursor):
+    """Data version metadata and the materialized matchup matrix"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS matchup_matrix (
+            home_team_id INTEGER NOT NULL,
+            away_team_id INTEGER NOT NULL,
+            venue_id INTEGER NOT NULL,
+            home_win_percentage REAL NOT NULL,
+            avg_home_score REAL NOT NULL,
+            avg_away_score REAL NOT NULL,
+            total_simulations INTEGER NOT NULL,
+            PRIMARY KEY (home_team_id, away_team_id, venue_id)
+        )
+    ''')
+
+
+def create_natural_keys(cursor):
+    """Unique (team_id, simulation_run) and (home_team, away_team, date)
+
+    Databases built before these keys existed may hold repeated copies of the
+    CSV data, so duplicates are dropped (keeping the first copy) beforehand.
+    """
+    cursor.execute('''
+        DELETE FROM simulations WHERE id NOT IN (
+            SELECT MIN(id) FROM simulations GROUP BY team_id, simulation_run
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_simulations_team_run
+        ON simulations (team_id, simulation_run)
+    ''')
+    cursor.execute('''
+        DELETE FROM games WHERE id NOT IN (
+            SELECT MIN(id) FROM games GROUP BY home_team, away_team, date
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_games_matchup_date
+        ON games (home_team, away_team, date)
+    ''')
+
+
+def normalize_games_team_ids(cursor):
+    """Replace the team names in games with team IDs
+
+    Games whose team names do not match a known team cannot be migrated and
+    are dropped.
+    """
+    cursor.execute('''
+        CREATE TABLE games_normalized (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            home_team_id INTEGER NOT NULL,
+            away_team_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            venue_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (home_team_id, away_team_id, date),
+            FOREIGN KEY (home_team_id) REFERENCES teams (id),
+            FOREIGN KEY (away_team_id) REFERENCES teams (id),
+            FOREIGN KEY (venue_id) REFERENCES venues (id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO games_normalized (id, home_team_id, away_team_id, date, venue_id, created_at)
+        SELECT g.id, h.id, a.id, g.date, g.venue_id, g.created_at
+        FROM games g
+        JOIN teams h ON h.name = g.home_team
+        JOIN teams a ON a.name = g.away_team
+    ''')
+    cursor.execute('DROP TABLE games')
+    cursor.execute('ALTER TABLE games_normalized RENAME TO games')
+
+
+def create_covering_indexes(cursor):
+    """Indexes that answer the hot API queries without a table scan or sort"""
+    # Simulation store load and per-team results lookups
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_simulations_team_results
+        ON simulations (team_id, results)
+    ''')
+    # Games listing, newest first
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_games_date
+        ON games (date, venue_id, home_team_id, away_team_id)
+    ''')
+
+
+def create_keyset_indexes(cursor):
+    """Covering indexes ordered by (date, id) for keyset pagination of games"""
+    cursor.execute('DROP INDEX IF EXISTS idx_games_date')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_games_date_id
+        ON games (date, id, venue_id, home_team_id, away_team_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_games_venue_date_id
+        ON games (venue_id, date, id, home_team_id, away_team_id)
+    ''')
+
+
+def create_matchup_matrix_stale_teams(cursor):
+    """Teams whose runs changed since the matchup matrix was built"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS matchup_matrix_stale_teams (
+            team_id INTEGER PRIMARY KEY
+        )
+    ''')
+
+
+def create_team_score_counts(cursor):
+    """Per-team counts of each distinct score, summarizing the simulations table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS team_score_counts (
+            team_id INTEGER NOT NULL,
+            results INTEGER NOT NULL,
+            runs INTEGER NOT NULL,
+            PRIMARY KEY (team_id, results)
+        ) WITHOUT ROWID
+    ''')
+
+
+MIGRATIONS = [
+    (1, "create base tables", create_base_tables),
+    (2, "add metadata and matchup matrix", create_metadata_and_matchup_matrix),
+    (3, "add natural keys", create_natural_keys),
+    (4, "normalize games to team IDs", normalize_games_team_ids),
+    (5, "add covering indexes", create_covering_indexes),
+    (6, "add keyset pagination indexes", create_keyset_indexes),
+    (7, "add matchup matrix stale teams", create_matchup_matrix_stale_teams),
+    (8, "add team score counts", create_team_score_counts),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every migration newer than the database's schema version
+
+    Each migration runs in its own transaction together with the version bump.
+    The database is also switched to WAL mode (kept in the file), so the API's
+    pooled readers are not blocked while runs are appended. Returns the
+    number of migrations applied.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    current = schema_version(conn)
+    applied = 0
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"🔧 Applying migration {version}: {description}")
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        applied += 1
+    return applied
+
+
+# Hot queries, built by the same functions the API uses, and the index each
+# one must be answered from
+HOT_QUERIES = [
+    ("simulation store load", SIMULATION_SCORES_QUERY, (), "idx_simulations_team_results"),
+    ("games listing", *games_query(), "idx_games_date_id"),
+    ("games page", *games_query(fetch=51), "idx_games_date_id"),
+    (
+        "games page after cursor",
+        *games_query(after=("2024-06-01", 10), fetch=51),
+        "idx_games_date_id (date<?)",
+    ),
+    (
+        "venue games page after cursor",
+        *games_query(venue_id=2, after=("2024-06-01", 10), fetch=51),
+        "idx_games_venue_date_id (venue_id=? AND date<?)",
+    ),
+    ("team games page", *games_query(team_id=0, fetch=51), "idx_games_date_id"),
+    (
+        "team games page after cursor",
+        *games_query(team_id=0, after=("2024-06-01", 10), fetch=51),
+        "idx_games_date_id (date<?)",
+    ),
+    ("team simulations", *simulations_query(team_id=0), "idx_simulations_team_run"),
+    (
+        "team simulations page after cursor",
+        *simulations_query(team_id=0, after=(500,)),
+        "idx_simulations_team_run (team_id=? AND simulation_run>?)",
+    ),
+    ("all simulations", *simulations_query(), "idx_simulations_team_run"),
+    (
+        "all simulations page after cursor",
+        *simulations_query(after=("Hull Stars", 500)),
+        "idx_simulations_team_run (team_id=? AND simulation_run>?)",
+    ),
+    (
+        "all simulations page after cursor, later teams",
+        *simulations_query(after=("Hull Stars", 500)),
+        "sqlite_autoindex_teams_1 (name>?)",
+    ),
+]
+
+
+def query_plan(conn, query, params=()):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def assert_hot_queries_use_indexes(conn, hot_queries=HOT_QUERIES):
+    """Raise AssertionError if a hot query scans a table or sorts in a temp B-tree"""
+    for name, query, params, index in hot_queries:
+        plan = query_plan(conn, query, params)
+        details = " | ".join(plan)
+        assert any(index in step for step in plan), f"{name} does not use {index}: {details}"
+        assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts in a temp B-tree: {details}"
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DATABASE_PATH)
+    applied = migrate(conn)
+    print(f"✅ Schema at version {schema_version(conn)} ({applied} migrations applied)")
+    if "--check" in sys.argv:
+        assert_hot_queries_use_indexes(conn)
+        print("✅ Hot queries use their indexes")
+    conn.close()
@@ -0,0 +1,40 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, types):
+    """Sort key values from a cursor, one per type in `types`
+
+    Raises a 400 if the cursor was not produced by encode_cursor for a sort
+    key of those types, so no malformed value ever reaches a query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass but never part of a sort key
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def page_rows(rows, limit, cursor_key):
+    """Split limit + 1 fetched rows into the page and the next-page cursor"""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_key(rows[-1]))
@@ -0,0 +1,101 @@
+"""SQL of the hot read paths, shared by the code that runs it and the index checks"""
+
+# Every simulation result, grouped by team and sorted within each team
+SIMULATION_SCORES_QUERY = "SELECT team_id, results FROM simulations ORDER BY team_id, results"
+
+
+def games_query(venue_id=None, team_id=None, date_from=None, date_to=None, after=None, fetch=None):
+    """SQL and parameters for games, newest first, with optional filters
+
+    `after` is the (date, id) sort key of the last game on the previous page
+    and `fetch` the number of rows to return.
+    """
+    conditions = []
+    params = []
+    if venue_id is not None:
+        conditions.append("g.venue_id = ?")
+        params.append(venue_id)
+    if team_id is not None:
+        conditions.append("(g.home_team_id = ? OR g.away_team_id = ?)")
+        params.extend([team_id, team_id])
+    if date_from is not None:
+        conditions.append("g.date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("g.date <= ?")
+        params.append(date_to)
+    if after is not None:
+        # Keyset condition on (date, id), written so SQLite can seek the index
+        last_date, last_id = after
+        conditions.append("g.date <= ? AND (g.date < ? OR g.id < ?)")
+        params.extend([last_date, last_date, last_id])
+
+    query = """
+        SELECT g.id, g.home_team_id, g.away_team_id, h.name as home_team, a.name as away_team,
+               g.date, g.venue_id, v.name as venue_name, v.home_multiplier
+        FROM games g
+        JOIN venues v ON g.venue_id = v.id
+        JOIN teams h ON g.home_team_id = h.id
+        JOIN teams a ON g.away_team_id = a.id
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY g.date DESC, g.id DESC"
+    if fetch is not None:
+        query += " LIMIT ?"
+        params.append(fetch)
+    return query, params
+
+
+SIMULATIONS_SELECT = """
+        SELECT s.id, s.team_id, s.simulation_run, s.results, t.name as team_name
+        FROM simulations s
+        JOIN teams t ON s.team_id = t.id
+"""
+
+
+def simulations_query(team_id=None, min_results=None, max_results=None, after=None, fetch=51):
+    """SQL and parameters for simulation runs with optional filters
+
+    Runs of one team are ordered by run number, otherwise by (team name,
+    run). `after` is the sort key of the last run on the previous page.
+    """
+    conditions = []
+    params = []
+    if min_results is not None:
+        conditions.append("s.results >= ?")
+        params.append(min_results)
+    if max_results is not None:
+        conditions.append("s.results <= ?")
+        params.append(max_results)
+
+    if team_id is None and after is not None:
+        # The rest of the cursor's team, then every later team. Each half seeks
+        # its own index, so a page costs the same however deep the cursor is.
+        last_team_name, last_run = after
+        same_team = ["t.name = ?", "s.simulation_run > ?", *conditions]
+        later_teams = ["t.name > ?", *conditions]
+        query = (
+            SIMULATIONS_SELECT + " WHERE " + " AND ".join(same_team)
+            + " UNION ALL " + SIMULATIONS_SELECT + " WHERE " + " AND ".join(later_teams)
+            + " ORDER BY team_name, simulation_run LIMIT ?"
+        )
+        return query, [last_team_name, last_run, *params, last_team_name, *params, fetch]
+
+    if team_id is not None:
+        conditions.append("s.team_id = ?")
+        params.append(team_id)
+        if after is not None:
+            (last_run,) = after
+            conditions.append("s.simulation_run > ?")
+            params.append(last_run)
+        order_by = "s.simulation_run"
+    else:
+        order_by = "t.name, s.simulation_run"
+
+    query = SIMULATIONS_SELECT
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {order_by} LIMIT ?"
+    params.append(fetch)
+    return query, params
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_MAX_ENTRIES = 1024
+RESULT_CACHE_TTL_SECONDS = 600
+
+
+class ResultCache:
+    """Bounded LRU cache with a per-entry time-to-live
+
+    Callers include the data version in their keys, so entries computed from
+    older data are never returned even before they are evicted.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, ttl_seconds=RESULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def make_etag(data_version, path, query, variant=""):
+    """Strong ETag for a GET response determined by the URL and the loaded data
+
+    `variant` distinguishes representations of the same URL, such as JSON
+    and MessagePack.
+    """
+    digest = hashlib.sha1(f"{path}?{query}#{variant}".encode()).hexdigest()[:16]
+    return f'"v{data_version}-{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches etag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+# Process-wide cache shared by all request handlers
+result_cache = ResultCache()
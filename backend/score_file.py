@@ -0,0 +1,108 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Layout (little-endian):
+#   header   magic, format version, team count, data version, total runs
+#   index    one (team_id, start, count) record per team, ordered by team_id
+#   scores   int32 results, each team's runs contiguous and sorted, starting
+#            at the first 64-byte boundary after the index
+SCORE_FILE_MAGIC = b"PLUTOSC1"
+SCORE_FILE_FORMAT = 1
+SCORE_FILE_ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("format", "<u4"),
+    ("team_count", "<u4"),
+    ("data_version", "<u8"),
+    ("total_runs", "<u8"),
+])
+INDEX_DTYPE = np.dtype([("team_id", "<i8"), ("start", "<u8"), ("count", "<u8")])
+SCORE_FILE_DTYPE = np.dtype("<i4")
+
+# Rows fetched from SQLite per step while writing
+WRITE_CHUNK_ROWS = 1_000_000
+
+
+def score_file_path(database_path):
+    """Score file that sits next to a database, e.g. plutodata.db -> plutodata.scores"""
+    return Path(database_path).with_suffix(".scores")
+
+
+def _scores_offset(team_count):
+    index_end = HEADER_DTYPE.itemsize + team_count * INDEX_DTYPE.itemsize
+    return -(-index_end // SCORE_FILE_ALIGNMENT) * SCORE_FILE_ALIGNMENT
+
+
+def write_score_file(conn, path, data_version):
+    """Write every team's sorted results to `path` for the given data version
+
+    The file is written next to the target and renamed over it, so processes
+    that have the old file mapped keep a consistent view until they reload.
+    Returns the number of runs written.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT team_id, COUNT(*) FROM simulations GROUP BY team_id ORDER BY team_id")
+    team_counts = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+
+    index = np.zeros(len(team_counts), dtype=INDEX_DTYPE)
+    index["team_id"] = team_counts[:, 0]
+    index["count"] = team_counts[:, 1]
+    index["start"] = np.concatenate(([0], np.cumsum(team_counts[:, 1])[:-1])).astype(np.uint64)
+    total_runs = int(team_counts[:, 1].sum())
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = SCORE_FILE_MAGIC
+    header["format"] = SCORE_FILE_FORMAT
+    header["team_count"] = len(index)
+    header["data_version"] = data_version
+    header["total_runs"] = total_runs
+
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    scores_offset = _scores_offset(len(index))
+    with open(temp_path, "wb") as file:
+        file.write(header.tobytes())
+        file.write(index.tobytes())
+        file.write(b"\0" * (scores_offset - file.tell()))
+
+        # The covering (team_id, results) index returns the rows already sorted
+        cursor.execute("SELECT results FROM simulations ORDER BY team_id, results")
+        while True:
+            rows = cursor.fetchmany(WRITE_CHUNK_ROWS)
+            if not rows:
+                break
+            file.write(np.fromiter((row[0] for row in rows), dtype=SCORE_FILE_DTYPE, count=len(rows)).tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    return total_runs
+
+
+def open_score_file(path):
+    """Map a score file read-only
+
+    Returns (data_version, scores, {team_id: (start, end)}) where scores is a
+    read-only memmap, or None if the file is missing or not a score file.
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size < HEADER_DTYPE.itemsize:
+        return None
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+    if header["magic"] != SCORE_FILE_MAGIC or header["format"] != SCORE_FILE_FORMAT:
+        return None
+
+    team_count = int(header["team_count"])
+    total_runs = int(header["total_runs"])
+    index = np.fromfile(path, dtype=INDEX_DTYPE, count=team_count, offset=HEADER_DTYPE.itemsize)
+    if total_runs:
+        scores = np.memmap(path, dtype=SCORE_FILE_DTYPE, mode="r", offset=_scores_offset(team_count), shape=(total_runs,))
+    else:
+        scores = np.empty(0, dtype=SCORE_FILE_DTYPE)
+    team_ranges = {
+        int(team_id): (int(start), int(start + count))
+        for team_id, start, count in index.tolist()
+    }
+    return int(header["data_version"]), scores, team_ranges
@@ -0,0 +1,202 @@
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+
+from database import DATABASE_PATH
+from matchup_batch import PROCESS_POOL_WORKERS, get_process_pool, shutdown_process_pool
+from simulation_store import SimulationStore
+
+# Ladder points for a win and a tie (adjusted home score equal to away score)
+WIN_POINTS = 2
+TIE_POINTS = 1
+DEFAULT_FINALS_SPOTS = 4
+
+# Seasons simulated per task. Each task gets its own seed from the base seed,
+# so results depend only on the seed and season count, not on worker count.
+SEASON_CHUNK = 2_000
+# Below this many seasons the work is done in-process
+PROCESS_POOL_MIN_SEASONS = 20_000
+
+
+class Season:
+    """A fixture list laid out as arrays for vectorized simulation
+
+    Every team's runs are packed into one array, so a fixture's draw is an
+    index into it: start + floor(u * count).
+    """
+
+    def __init__(self, store, fixtures):
+        self.team_ids = np.array(sorted(store.teams), dtype=np.int64)
+        team_index = {int(team_id): i for i, team_id in enumerate(self.team_ids)}
+
+        team_scores = [store.team_scores(int(team_id)) for team_id in self.team_ids]
+        counts = np.array([len(scores) for scores in team_scores], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        self.scores = np.concatenate(team_scores) if team_scores else store.scores[:0]
+
+        fixtures = [
+            (home, away, venue) for home, away, venue in fixtures
+            if counts[team_index[home]] and counts[team_index[away]]
+        ]
+        self.home = np.array([team_index[home] for home, _, _ in fixtures], dtype=np.int64)
+        self.away = np.array([team_index[away] for _, away, _ in fixtures], dtype=np.int64)
+        self.multipliers = np.array(
+            [store.venues[venue]["home_multiplier"] for _, _, venue in fixtures], dtype=np.float64
+        )
+        self.home_start, self.home_count = starts[self.home], counts[self.home]
+        self.away_start, self.away_count = starts[self.away], counts[self.away]
+
+    @property
+    def fixtures(self):
+        return len(self.home)
+
+    def arrays(self):
+        """Everything a worker process needs, as plain arrays"""
+        return (
+            self.scores, len(self.team_ids), self.home, self.away, self.multipliers,
+            self.home_start, self.home_count, self.away_start, self.away_count,
+        )
+
+
+def simulate_seasons(arrays, n_seasons, seed_sequence):
+    """Simulate n_seasons seasons and tally each team's final ladder positions
+
+    Returns (position_counts, points_sum) where position_counts[t, p] is how
+    often team t finished in position p (0 = top of the ladder).
+    """
+    (scores, n_teams, home, away, multipliers,
+     home_start, home_count, away_start, away_count) = arrays
+    rng = np.random.default_rng(seed_sequence)
+    n_fixtures = len(home)
+
+    # One run drawn per team per fixture per season, shape (seasons, fixtures)
+    home_draws = home_start + (rng.random((n_seasons, n_fixtures)) * home_count).astype(np.int64)
+    away_draws = away_start + (rng.random((n_seasons, n_fixtures)) * away_count).astype(np.int64)
+    home_scores = scores[home_draws] * multipliers
+    away_scores = scores[away_draws].astype(np.float64)
+
+    home_won = home_scores > away_scores
+    tied = home_scores == away_scores
+    home_points = np.where(home_won, WIN_POINTS, np.where(tied, TIE_POINTS, 0))
+    away_points = np.where(tied, TIE_POINTS, np.where(home_won, 0, WIN_POINTS))
+    margin = home_scores - away_scores
+
+    # Fixture -> team incidence matrices turn per-fixture results into
+    # per-team season totals with one matrix product each
+    home_incidence = np.zeros((n_fixtures, n_teams))
+    home_incidence[np.arange(n_fixtures), home] = 1
+    away_incidence = np.zeros((n_fixtures, n_teams))
+    away_incidence[np.arange(n_fixtures), away] = 1
+    points = home_points @ home_incidence + away_points @ away_incidence
+    run_difference = margin @ home_incidence - margin @ away_incidence
+
+    # Ladder order: points, then run difference, then team order
+    ladder = np.lexsort((-run_difference, -points), axis=-1)
+    positions = np.empty_like(ladder)
+    np.put_along_axis(positions, ladder, np.arange(n_teams), axis=-1)
+
+    position_counts = np.bincount(
+        (np.arange(n_teams) * n_teams + positions).ravel(), minlength=n_teams * n_teams
+    ).reshape(n_teams, n_teams)
+    return position_counts, points.sum(axis=0)
+
+
+def _simulate_chunk(task):
+    """Worker: simulate one chunk of seasons"""
+    arrays, n_seasons, seed_sequence = task
+    return simulate_seasons(arrays, n_seasons, seed_sequence)
+
+
+def run_season_simulation(season, n_seasons, seed, use_process_pool=None):
+    """Simulate n_seasons seasons in fixed-size chunks, optionally across processes
+
+    Returns (position_counts, points_sum) summed over all chunks.
+    """
+    chunk_sizes = [min(SEASON_CHUNK, n_seasons - start) for start in range(0, n_seasons, SEASON_CHUNK)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    arrays = season.arrays()
+    tasks = [(arrays, size, seed_sequence) for size, seed_sequence in zip(chunk_sizes, seed_sequences)]
+
+    if use_process_pool is None:
+        use_process_pool = n_seasons >= PROCESS_POOL_MIN_SEASONS and PROCESS_POOL_WORKERS > 1
+    results = get_process_pool().map(_simulate_chunk, tasks) if use_process_pool else map(_simulate_chunk, tasks)
+
+    n_teams = len(season.team_ids)
+    position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    points_sum = np.zeros(n_teams)
+    for chunk_positions, chunk_points in results:
+        position_counts += chunk_positions
+        points_sum += chunk_points
+    return position_counts, points_sum
+
+
+def summarize_positions(store, season, position_counts, points_sum, n_seasons, finals_spots):
+    """Per-team ladder position probabilities, best expected finish first"""
+    probabilities = position_counts / n_seasons
+    positions = np.arange(1, len(season.team_ids) + 1)
+    teams = []
+    for i, team_id in enumerate(season.team_ids):
+        teams.append({
+            "team_id": int(team_id),
+            "team_name": store.teams[int(team_id)],
+            "expected_position": round(float(probabilities[i] @ positions), 3),
+            "average_points": round(float(points_sum[i] / n_seasons), 3),
+            "finals_probability": round(float(probabilities[i, :finals_spots].sum()), 4),
+            "position_probabilities": [round(float(p), 4) for p in probabilities[i]],
+        })
+    teams.sort(key=lambda team: team["expected_position"])
+    return teams
+
+
+def simulate_season(store, fixtures, n_seasons, seed, finals_spots=DEFAULT_FINALS_SPOTS, use_process_pool=None):
+    """Ladder-position and finals probabilities for a fixture list"""
+    season = Season(store, fixtures)
+    position_counts, points_sum = run_season_simulation(season, n_seasons, seed, use_process_pool)
+    return {
+        "seasons": n_seasons,
+        "seed": seed,
+        "fixtures": season.fixtures,
+        "finals_spots": finals_spots,
+        "teams": summarize_positions(store, season, position_counts, points_sum, n_seasons, finals_spots),
+    }
+
+
+def load_fixtures(conn):
+    """(home_team_id, away_team_id, venue_id) for every game, in date order"""
+    return conn.execute(
+        "SELECT home_team_id, away_team_id, venue_id FROM games ORDER BY date, id"
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the season in the games table")
+    parser.add_argument("--seasons", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--finals-spots", type=int, default=DEFAULT_FINALS_SPOTS)
+    parser.add_argument("--processes", action=argparse.BooleanOptionalAction, default=None,
+                        help="Force the process pool on or off (default: on for large runs)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    store = SimulationStore()
+    store.load(conn)
+    fixtures = load_fixtures(conn)
+    conn.close()
+
+    start = time.perf_counter()
+    try:
+        result = simulate_season(store, fixtures, args.seasons, args.seed, args.finals_spots, args.processes)
+    finally:
+        shutdown_process_pool()
+    elapsed = time.perf_counter() - start
+
+    print(f"🏏 {result['seasons']} seasons of {result['fixtures']} fixtures (seed {result['seed']})")
+    print(f"{'Team':<28}{'Exp. pos':>10}{'Points':>10}{'Finals':>10}")
+    for team in result["teams"]:
+        print(
+            f"{team['team_name']:<28}{team['expected_position']:>10.2f}"
+            f"{team['average_points']:>10.2f}{team['finals_probability']:>10.1%}"
+        )
+    print(f"✅ {elapsed:.2f}s ({args.seasons / elapsed:,.0f} seasons/sec)")
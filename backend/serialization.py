@@ -0,0 +1,119 @@
+import gzip
+import json
+
+import numpy as np
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from metrics import stage
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when installed
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Brotli is only offered when installed; gzip always is
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = 4096
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _to_builtin(value):
+    """Fallback conversion for types the encoders do not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps_json(content):
+    """Compact UTF-8 JSON; NumPy arrays and scalars are written directly"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_to_builtin, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(content):
+    return msgpack.packb(content, default=_to_builtin, use_bin_type=True)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, recorded as the "serialize" stage"""
+
+    def render(self, content):
+        with stage("serialize"):
+            return dumps_json(content)
+
+
+def preferred(header, options):
+    """The option the client weights highest in an Accept-style header, or None
+
+    Ties go to the earlier option; options the header does not list (and
+    anything with q=0) are never chosen.
+    """
+    weights = {}
+    for part in (header or "").split(","):
+        name, *params = [piece.strip() for piece in part.split(";")]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    best = None
+    for option in options:
+        weight = weights.get(option, weights.get("*/*", 0.0) if "/" in option else weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (option, weight)
+    return best[0] if best else None
+
+
+def negotiated_media_type(request):
+    """application/json unless the client prefers MessagePack and it is installed"""
+    if msgpack is None:
+        return JSON_MEDIA_TYPE
+    return preferred(request.headers.get("accept"), (JSON_MEDIA_TYPE, *MSGPACK_MEDIA_TYPES)) or JSON_MEDIA_TYPE
+
+
+def negotiated_encoding(request):
+    encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+    return preferred(request.headers.get("accept-encoding"), encodings)
+
+
+def fast_response(request, content, headers=None):
+    """Serialize pre-shaped content straight to a Response
+
+    Skips FastAPI's jsonable_encoder and response-model validation. The body
+    is JSON or MessagePack per the Accept header, and is compressed with
+    brotli or gzip per Accept-Encoding once it reaches COMPRESSION_MIN_BYTES.
+    """
+    media_type = negotiated_media_type(request)
+    with stage("serialize"):
+        body = dumps_json(content) if media_type == JSON_MEDIA_TYPE else dumps_msgpack(content)
+
+    headers = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+    encoding = negotiated_encoding(request) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding is not None:
+        with stage("compress"):
+            if encoding == "br":
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
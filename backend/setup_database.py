@@ -1,166 +1,222 @@
 import sqlite3
 import csv
+import hashlib
 import os
+import time
 
-def create_database():
+from data_version import bump_data_version, read_data_version
+from database import DATABASE_PATH
+from ingest import find_simulations_input, ingest_simulations
+from matchup_matrix import build_matchup_matrix, matchup_matrix_is_complete
+from migrations import migrate
+from score_file import open_score_file, score_file_path, write_score_file
+from team_stats import build_team_score_counts, team_stats_version
+
+# Rows per executemany call
+BATCH_SIZE = 50_000
+
+def create_database(database_path=DATABASE_PATH):
     """Create the SQLite database and tables"""
     
     # Connect to database (creates it if it doesn't exist)
-    conn = sqlite3.connect('plutodata.db')
+    conn = sqlite3.connect(database_path)
     cursor = conn.cursor()
     
+    # migrate() below also switches the file to WAL, so the API's read-only
+    # connections can read while this script writes
+    apply_bulk_load_pragmas(cursor)
+    
     print("🔧 Creating database tables...")
     
-    # Create teams table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS teams (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL UNIQUE
-        )
-    ''')
+    # Bring the schema up to date
+    migrate(conn)
     
-    # Create venues table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS venues (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL UNIQUE,
-            home_multiplier REAL NOT NULL
-        )
-    ''')
+    print("✅ Database tables created successfully!")
     
-    # Create simulations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS simulations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            team_id INTEGER NOT NULL,
-            simulation_run INTEGER NOT NULL,
-            results INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (team_id) REFERENCES teams (id)
-        )
-    ''')
+    # Load CSV data in a single transaction
+    try:
+        loaded = load_all_csv_data(cursor)
+        if loaded:
+            bump_data_version(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     
-    # Create games table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS games (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            home_team TEXT NOT NULL,
-            away_team TEXT NOT NULL,
-            date TEXT NOT NULL,
-            venue_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (venue_id) REFERENCES venues (id)
-        )
-    ''')
+    # Columnar copy of the results that the API memory-maps at startup
+    data_version = read_data_version(cursor)
+    score_path = score_file_path(database_path)
+    score_file = open_score_file(score_path)
+    if loaded or score_file is None or score_file[0] != data_version:
+        print("💾 Writing score file...")
+        runs = write_score_file(conn, score_path, data_version)
+        print(f"✅ Wrote {runs:,} runs to {score_path}")
     
-    print("✅ Database tables created successfully!")
+    # Runs added through the API leave the matrix without the affected teams
+    if loaded or not matchup_matrix_is_complete(conn):
+        # Precompute every (home, away, venue) matchup for the new data
+        print("🧮 Building matchup matrix...")
+        entries = build_matchup_matrix(conn, score_path)
+        print(f"✅ Matchup matrix built with {entries} entries (data version {data_version})")
+    else:
+        print("⏭️  CSV files unchanged, nothing to reload")
     
-    # Load CSV data
-    load_all_csv_data(cursor)
+    # Per-team score summary served by /api/teams/stats
+    if loaded or team_stats_version(cursor) != data_version:
+        rows = build_team_score_counts(conn)
+        print(f"📊 Team score summary built with {rows} rows")
     
     # Commit changes and close connection
     conn.commit()
     conn.close()
     print("🎉 Database setup complete!")
 
+def apply_bulk_load_pragmas(cursor):
+    """Trade durability of the in-progress load for speed; the load is one transaction"""
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA cache_size = -262144")  # 256 MB
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_unchanged(cursor, path):
+    """True if the file's content matches the last load recorded in metadata"""
+    cursor.execute(
+        "SELECT value FROM metadata WHERE key = ?",
+        (f"file_hash:{os.path.basename(path)}",)
+    )
+    row = cursor.fetchone()
+    return row is not None and row[0] == file_hash(path)
+
+def record_file_hash(cursor, path):
+    cursor.execute(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+        (f"file_hash:{os.path.basename(path)}", file_hash(path))
+    )
+
+def batched(rows, batch_size=BATCH_SIZE):
+    """Group an iterable of rows into lists of at most batch_size"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 def load_all_csv_data(cursor):
-    """Load data from all CSV files into database"""
+    """Load data from all CSV files into database
+
+    Files whose content hash matches the previous load are skipped. Returns
+    True if anything was loaded.
+    """
     
-    # Load teams and simulations
-    csv_path = '../data/simulations.csv'
-    if os.path.exists(csv_path):
-        print("📊 Loading teams and simulations data...")
-        load_simulations_data(cursor, csv_path)
-    else:
-        print(f"⚠️  Simulations CSV file not found at {csv_path}")
+    loaders = [
+        # Load teams and simulations
+        (find_simulations_input('../data'), "📊 Loading teams and simulations data...", load_simulations_data),
+        # Load venues
+        ('../data/venues.csv', "🏟️  Loading venues data...", load_venues_data),
+        # Load games
+        ('../data/games.csv', "⚽ Loading games data...", load_games_data),
+    ]
     
-    # Load venues
-    venues_path = '../data/venues.csv'
-    if os.path.exists(venues_path):
-        print("🏟️  Loading venues data...")
-        load_venues_data(cursor, venues_path)
-    else:
-        print(f"⚠️  Venues CSV file not found at {venues_path}")
+    loaded = False
+    for csv_path, message, load_data in loaders:
+        if not os.path.exists(csv_path):
+            print(f"⚠️  CSV file not found at {csv_path}")
+            continue
+        if file_unchanged(cursor, csv_path):
+            print(f"⏭️  {os.path.basename(csv_path)} unchanged since last load, skipping")
+            continue
+        print(message)
+        load_data(cursor, csv_path)
+        record_file_hash(cursor, csv_path)
+        loaded = True
     
-    # Load games
-    games_path = '../data/games.csv'
-    if os.path.exists(games_path):
-        print("⚽ Loading games data...")
-        load_games_data(cursor, games_path)
-    else:
-        print(f"⚠️  Games CSV file not found at {games_path}")
+    return loaded
 
-def load_simulations_data(cursor, csv_path):
-    """Load teams and simulations from CSV"""
-    
-    teams_added = set()
+def report_load_rate(label, rows, started):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"✅ Loaded {rows:,} {label} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+def load_simulations_data(cursor, path):
+    """Load teams and simulations from a CSV, Parquet or Arrow file"""
     
-    with open(csv_path, 'r') as file:
-        csv_reader = csv.DictReader(file)
-        
-        for row in csv_reader:
-            team_id = int(row['team_id'])
-            team_name = row['team']
-            simulation_run = int(row['simulation_run'])
-            results = int(row['results'])
-            
-            # Add team if not already added
-            if team_id not in teams_added:
-                cursor.execute(
-                    'INSERT OR IGNORE INTO teams (id, name) VALUES (?, ?)',
-                    (team_id, team_name)
-                )
-                teams_added.add(team_id)
-            
-            # Add simulation record
-            cursor.execute(
-                'INSERT INTO simulations (team_id, simulation_run, results) VALUES (?, ?, ?)',
-                (team_id, simulation_run, results)
-            )
+    started = time.perf_counter()
+    teams, rows = ingest_simulations(cursor, path)
     
-    print(f"✅ Loaded {len(teams_added)} teams and simulation data")
+    print(f"✅ Loaded {len(teams)} teams")
+    report_load_rate("simulation runs", rows, started)
 
 def load_venues_data(cursor, csv_path):
     """Load venues from CSV"""
     
-    with open(csv_path, 'r') as file:
+    started = time.perf_counter()
+    with open(csv_path, 'r', newline='') as file:
         csv_reader = csv.DictReader(file)
-        
-        for row in csv_reader:
-            venue_id = int(row['venue_id'])
-            venue_name = row['venue_name']
-            home_multiplier = float(row['home_multiplier'])
-            
-            cursor.execute(
-                'INSERT OR IGNORE INTO venues (id, name, home_multiplier) VALUES (?, ?, ?)',
-                (venue_id, venue_name, home_multiplier)
-            )
+        venues = [
+            (int(row['venue_id']), row['venue_name'], float(row['home_multiplier']))
+            for row in csv_reader
+        ]
     
-    print("✅ Venues data loaded")
+    cursor.executemany(
+        '''
+        INSERT INTO venues (id, name, home_multiplier) VALUES (?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET name = excluded.name, home_multiplier = excluded.home_multiplier
+        ''',
+        venues
+    )
+    
+    report_load_rate("venues", len(venues), started)
 
 def load_games_data(cursor, csv_path):
-    """Load games from CSV"""
+    """Load games from CSV, resolving team names to team IDs"""
     
-    with open(csv_path, 'r') as file:
-        csv_reader = csv.DictReader(file)
-        
+    started = time.perf_counter()
+    cursor.execute('SELECT name, id FROM teams')
+    team_ids = dict(cursor.fetchall())
+    rows = 0
+    unknown_teams = set()
+    
+    def game_rows(csv_reader):
         for row in csv_reader:
-            home_team = row['home_team']
-            away_team = row['away_team']
-            date = row['date']
-            venue_id = int(row['venue_id'])
-            
-            cursor.execute(
-                'INSERT INTO games (home_team, away_team, date, venue_id) VALUES (?, ?, ?, ?)',
-                (home_team, away_team, date, venue_id)
+            home_team_id = team_ids.get(row['home_team'])
+            away_team_id = team_ids.get(row['away_team'])
+            if home_team_id is None or away_team_id is None:
+                unknown_teams.update(
+                    name for name in (row['home_team'], row['away_team']) if name not in team_ids
+                )
+                continue
+            yield (home_team_id, away_team_id, row['date'], int(row['venue_id']))
+    
+    with open(csv_path, 'r', newline='') as file:
+        csv_reader = csv.DictReader(file)
+        for batch in batched(game_rows(csv_reader)):
+            cursor.executemany(
+                '''
+                INSERT INTO games (home_team_id, away_team_id, date, venue_id) VALUES (?, ?, ?, ?)
+                ON CONFLICT (home_team_id, away_team_id, date) DO UPDATE SET venue_id = excluded.venue_id
+                ''',
+                batch
             )
+            rows += len(batch)
     
-    print("✅ Games data loaded")
+    if unknown_teams:
+        print(f"⚠️  Skipped games with unknown teams: {', '.join(sorted(unknown_teams))}")
+    report_load_rate("games", rows, started)
 
-def test_database():
+def test_database(database_path=DATABASE_PATH):
     """Test the database by running some queries"""
     
-    conn = sqlite3.connect('plutodata.db')
+    conn = sqlite3.connect(database_path)
     cursor = conn.cursor()
     
     print("\n🧪 Testing database...")
@@ -191,9 +247,11 @@ def test_database():
     # Show sample games with venue info
     print("\n⚽ Sample games with venues:")
     cursor.execute('''
-        SELECT g.home_team, g.away_team, g.date, v.name as venue_name
+        SELECT h.name as home_team, a.name as away_team, g.date, v.name as venue_name
         FROM games g
         JOIN venues v ON g.venue_id = v.id
+        JOIN teams h ON g.home_team_id = h.id
+        JOIN teams a ON g.away_team_id = a.id
         ORDER BY g.date
         LIMIT 5
     ''')
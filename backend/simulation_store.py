@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+
+from data_version import read_data_version
+from matchup_engine import merge_value_counts, sorted_value_counts
+from queries import SIMULATION_SCORES_QUERY
+from score_file import open_score_file
+
+SCORE_DTYPE = np.int32
+
+
+class SimulationStore:
+    """In-memory copy of the simulations, teams and venues tables
+
+    All simulation results are held in one contiguous int32 array ordered by
+    (team_id, results), and each team's runs are a sorted view into it. When
+    a score file for the current data version exists, that array is a
+    read-only memory map of the file instead of a copy read from SQLite.
+    Runs added after loading go into a new array for that team only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.data_version = 0
+        self.scores = np.empty(0, dtype=SCORE_DTYPE)
+        self.team_scores_by_id = {}
+        self._value_counts_by_id = {}
+        self.score_source = None
+        self.teams = {}
+        self.team_ids_by_name = {}
+        self.venues = {}
+
+    def load(self, conn, score_path=None):
+        """Rebuild the store from an open SQLite connection
+
+        Scores come from the score file at `score_path` if it was written for
+        the database's current data version, and from SQLite otherwise.
+        """
+        cursor = conn.cursor()
+        data_version = read_data_version(cursor)
+
+        score_file = open_score_file(score_path) if score_path is not None else None
+        if score_file is not None and score_file[0] == data_version:
+            _, scores, team_ranges = score_file
+            score_source = "mmap"
+        else:
+            scores, team_ranges = self._read_scores(cursor)
+            score_source = "sqlite"
+
+        team_scores_by_id = {
+            team_id: scores[start:end] for team_id, (start, end) in team_ranges.items()
+        }
+
+        cursor.execute("SELECT id, name FROM teams ORDER BY name")
+        teams = {team_id: name for team_id, name in cursor.fetchall()}
+
+        cursor.execute("SELECT id, name, home_multiplier FROM venues ORDER BY name")
+        venues = {
+            venue_id: {"id": venue_id, "name": name, "home_multiplier": home_multiplier}
+            for venue_id, name, home_multiplier in cursor.fetchall()
+        }
+
+        # Swap everything in at once so readers never see a half-built store
+        with self._lock:
+            self.scores = scores
+            self.team_scores_by_id = team_scores_by_id
+            self._value_counts_by_id = {}
+            self.score_source = score_source
+            self.teams = teams
+            self.team_ids_by_name = {name: team_id for team_id, name in teams.items()}
+            self.venues = venues
+            self.data_version = data_version
+            self.loaded = True
+
+    @staticmethod
+    def _read_scores(cursor):
+        """All results sorted by (team_id, results) and each team's (start, end) in them"""
+        cursor.execute(SIMULATION_SCORES_QUERY)
+        rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+        scores = np.ascontiguousarray(rows[:, 1], dtype=SCORE_DTYPE)
+
+        # Split the single sorted array into one range per team
+        team_ids, starts = np.unique(rows[:, 0], return_index=True)
+        ends = np.append(starts[1:], len(scores))
+        team_ranges = {
+            int(team_id): (int(start), int(end))
+            for team_id, start, end in zip(team_ids, starts, ends)
+        }
+        return scores, team_ranges
+
+    def team_scores(self, team_id):
+        """Sorted simulation results for a team (empty if it has none)"""
+        return self.team_scores_by_id.get(team_id, self.scores[:0])
+
+    def team_value_counts(self, team_id):
+        """A team's distinct scores and their counts, computed once per data version"""
+        # load() swaps this memo in after the scores, so a memo read here never
+        # predates the scores it is filled from
+        value_counts_by_id = self._value_counts_by_id
+        value_counts = value_counts_by_id.get(team_id)
+        if value_counts is None:
+            value_counts = value_counts_by_id[team_id] = sorted_value_counts(self.team_scores(team_id))
+        return value_counts
+
+    def add_runs(self, team_id, results, data_version):
+        """Merge newly stored runs into a team's sorted scores
+
+        The team gets a new merged array; the shared array (possibly a
+        read-only memory map) and every other team's view are left alone.
+        Cached value counts for the team are updated rather than recomputed.
+        Returns the team's new run count.
+        """
+        new_scores = np.sort(np.asarray(results, dtype=SCORE_DTYPE))
+        with self._lock:
+            scores = self.team_scores(team_id)
+            merged = np.insert(scores, np.searchsorted(scores, new_scores), new_scores)
+            value_counts_by_id = dict(self._value_counts_by_id)
+            if team_id in value_counts_by_id:
+                value_counts_by_id[team_id] = merge_value_counts(
+                    value_counts_by_id[team_id], sorted_value_counts(new_scores)
+                )
+
+            self.team_scores_by_id = {**self.team_scores_by_id, team_id: merged}
+            self._value_counts_by_id = value_counts_by_id
+            self.data_version = data_version
+        return len(merged)
+
+    def memory_usage(self):
+        """Approximate memory held by the store"""
+        team_scores = self.team_scores_by_id.values()
+        return {
+            "data_version": self.data_version,
+            "teams": len(self.teams),
+            "venues": len(self.venues),
+            "simulation_runs": sum(len(scores) for scores in team_scores),
+            "score_bytes": sum(scores.nbytes for scores in team_scores),
+        }
+
+
+# Process-wide store shared by all request handlers
+simulation_store = SimulationStore()
@@ -0,0 +1,151 @@
+import math
+import sqlite3
+
+import numpy as np
+
+from data_version import read_data_version
+from matchup_engine import DEFAULT_QUANTILES, merge_value_counts, sorted_value_counts
+
+
+def build_team_score_counts(conn):
+    """Batch job: rebuild the team_score_counts summary for the current data version
+
+    One row per (team, distinct score) with the number of runs that scored
+    it; every team statistic is derived from these rows. Returns the row count.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM team_score_counts")
+    # Grouped straight off the covering (team_id, results) index
+    cursor.execute("""
+        INSERT INTO team_score_counts (team_id, results, runs)
+        SELECT team_id, results, COUNT(*) FROM simulations GROUP BY team_id, results
+    """)
+    cursor.execute(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('team_stats_version', ?)",
+        (str(read_data_version(cursor)),)
+    )
+    conn.commit()
+
+    cursor.execute("SELECT COUNT(*) FROM team_score_counts")
+    return cursor.fetchone()[0]
+
+
+def team_stats_version(cursor):
+    """Data version the summary table was built for, or None"""
+    try:
+        cursor.execute("SELECT value FROM metadata WHERE key = 'team_stats_version'")
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+def add_team_score_counts(cursor, team_id, results):
+    """Fold new runs for a team into team_score_counts (inside the caller's transaction)"""
+    values, counts = sorted_value_counts(np.sort(np.asarray(results, dtype=np.int64)))
+    cursor.executemany(
+        """
+        INSERT INTO team_score_counts (team_id, results, runs) VALUES (?, ?, ?)
+        ON CONFLICT (team_id, results) DO UPDATE SET runs = runs + excluded.runs
+        """,
+        ((team_id, value, count) for value, count in zip(values.tolist(), counts.tolist()))
+    )
+
+
+def quantile_label(q):
+    """Response key of a quantile: p05 for 0.05, p2.5 for 0.025"""
+    percent = round(float(q) * 100, 6)
+    if percent.is_integer():
+        return f"p{int(percent):02d}"
+    return f"p{percent:g}"
+
+
+class TeamSummary:
+    """Score distribution of one team, kept as distinct values and cumulative counts"""
+
+    def __init__(self, values, counts):
+        self.values = np.asarray(values, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.cumulative = np.cumsum(self.counts)
+        self.runs = int(self.cumulative[-1]) if len(self.cumulative) else 0
+        if self.runs:
+            weighted = self.values.astype(np.float64)
+            self.mean = float(np.dot(weighted, self.counts) / self.runs)
+            self.variance = float(np.dot((weighted - self.mean) ** 2, self.counts) / self.runs)
+        else:
+            self.mean = None
+            self.variance = None
+
+    def quantile(self, q):
+        """Smallest score with at least a fraction q of the runs at or below it"""
+        index = int(np.searchsorted(self.cumulative, q * self.runs, side="left"))
+        return int(self.values[min(index, len(self.values) - 1)])
+
+    def describe(self, quantiles=DEFAULT_QUANTILES):
+        if not self.runs:
+            return {"runs": 0, "mean": None, "std": None, "min": None, "max": None, "quantiles": {}}
+        return {
+            "runs": self.runs,
+            "mean": round(self.mean, 2),
+            "std": round(math.sqrt(self.variance), 2),
+            "min": int(self.values[0]),
+            "max": int(self.values[-1]),
+            "quantiles": {quantile_label(q): self.quantile(q) for q in quantiles},
+        }
+
+
+class TeamStats:
+    """In-memory copy of the team_score_counts summary for one data version"""
+
+    def __init__(self):
+        self.summaries = {}
+        self.data_version = None
+        self.source = None
+
+    def load(self, conn, store):
+        """Load the summary table, or derive it from the store's scores if it is stale
+
+        Either way the simulations table is never scanned.
+        """
+        cursor = conn.cursor()
+        data_version = store.data_version
+        summaries = {}
+        if team_stats_version(cursor) == data_version:
+            cursor.execute("SELECT team_id, results, runs FROM team_score_counts ORDER BY team_id, results")
+            rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+            team_ids, starts = np.unique(rows[:, 0], return_index=True)
+            ends = np.append(starts[1:], len(rows))
+            for team_id, start, end in zip(team_ids.tolist(), starts.tolist(), ends.tolist()):
+                summaries[team_id] = TeamSummary(rows[start:end, 1], rows[start:end, 2])
+            source = "table"
+        else:
+            for team_id in store.teams:
+                summaries[team_id] = TeamSummary(*store.team_value_counts(team_id))
+            source = "store"
+
+        self.summaries = summaries
+        self.data_version = data_version
+        self.source = source
+
+    def add_runs(self, team_id, results, data_version):
+        """Merge new runs into a team's summary"""
+        summary = self.summaries.get(team_id)
+        new_counts = sorted_value_counts(np.sort(np.asarray(results, dtype=np.int64)))
+        value_counts = merge_value_counts((summary.values, summary.counts), new_counts) if summary else new_counts
+        self.summaries = {**self.summaries, team_id: TeamSummary(*value_counts)}
+        self.data_version = data_version
+
+    def get(self, team_id, store=None):
+        """Summary for a team (empty if it has no runs)
+
+        If `store` holds a different data version than the summaries, e.g.
+        mid-reload, the summary is derived from the store's scores instead.
+        """
+        if store is not None and store.data_version != self.data_version:
+            return TeamSummary(*store.team_value_counts(team_id))
+        summary = self.summaries.get(team_id)
+        return summary if summary is not None else TeamSummary([], [])
+
+
+# Process-wide team statistics shared by all request handlers
+team_stats = TeamStats()
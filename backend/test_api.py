@@ -0,0 +1,386 @@
+import asyncio
+import base64
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import serialization
+from database import Database
+from ingest import append_simulation_runs
+from matchup_engine import simulate_matchup
+from matchup_matrix import build_matchup_matrix
+from matchup_stream import iter_matchup_progress
+from migrations import migrate
+from pagination import encode_cursor
+from team_stats import build_team_score_counts
+
+TEAMS = [(0, "Zeta"), (1, "Alpha"), (2, "Mid"), (3, "Beta")]
+VENUES = [(1, "North Ground", 1.0), (2, "South Ground", 1.2), (3, "East Ground", 0.9)]
+# Several games share each date, so paging has to break ties on id
+GAMES = [
+    (home, away, f"2024-03-{day:02d}", venue)
+    for day, pairings in enumerate([
+        [(0, 1, 2), (2, 3, 2), (1, 2, 1), (3, 0, 2)],
+        [(1, 0, 2), (3, 2, 3), (0, 2, 2)],
+        [(2, 1, 1), (0, 3, 2), (1, 3, 2), (2, 0, 3), (3, 1, 2)],
+        [(1, 2, 2)],
+    ], start=1)
+    for home, away, venue in pairings
+]
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "plutodata.db"
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)", TEAMS)
+    conn.executemany("INSERT INTO venues (id, name, home_multiplier) VALUES (?, ?, ?)", VENUES)
+    conn.executemany(
+        "INSERT INTO simulations (team_id, simulation_run, results) VALUES (?, ?, ?)",
+        [(team_id, run, 100 + 7 * team_id + (run * 13) % 40) for team_id, _ in TEAMS for run in range(1, 9)],
+    )
+    conn.executemany("INSERT INTO games (home_team_id, away_team_id, date, venue_id) VALUES (?, ?, ?, ?)", GAMES)
+    conn.execute("INSERT INTO metadata (key, value) VALUES ('data_version', '1')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def client(database_path, monkeypatch):
+    """The API served from a migrated temporary database"""
+    monkeypatch.setattr(main, "DATABASE_PATH", str(database_path))
+    monkeypatch.setattr(main, "database", Database(str(database_path)))
+    with TestClient(main.app) as client:
+        yield client
+    main.database.close()
+
+
+def game_key(game):
+    return game["home_team"], game["away_team"], game["date"], game["venue_id"]
+
+
+def expected_games(venue_id=None, team_id=None, date_from=None, date_to=None):
+    """Games newest first (ties by id descending), as (home, away, date, venue) name tuples"""
+    names = dict(TEAMS)
+    games = [
+        (game_id, (names[home], names[away], date, venue))
+        for game_id, (home, away, date, venue) in enumerate(GAMES, start=1)
+        if (venue_id is None or venue == venue_id)
+        and (team_id is None or team_id in (home, away))
+        and (date_from is None or date >= date_from)
+        and (date_to is None or date <= date_to)
+    ]
+    games.sort(key=lambda game: (game[1][2], game[0]), reverse=True)
+    return [key for _, key in games]
+
+
+def fetch_pages(client, path, params):
+    """Follow X-Next-Cursor from the first page to the last"""
+    rows, pages = [], 0
+    params = dict(params)
+    while True:
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= params["limit"]
+        rows.extend(page)
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return rows, pages
+        params["cursor"] = cursor
+
+
+def test_games_pages_break_date_ties_by_id(client):
+    full = client.get("/api/games")
+    assert "x-next-cursor" not in full.headers
+    assert [game_key(game) for game in full.json()] == expected_games()
+
+    games, pages = fetch_pages(client, "/api/games", {"limit": 3})
+    assert [game_key(game) for game in games] == expected_games()
+    assert pages == 5
+
+
+@pytest.mark.parametrize("filters", [
+    {"team_id": 1},
+    {"venue_id": 2},
+    {"venue_id": 2, "team_id": 0},
+    {"date_from": "2024-03-02", "date_to": "2024-03-03"},
+    {"team_id": 3, "date_to": "2024-03-03"},
+])
+def test_games_filters_combine_with_cursor(client, filters):
+    games, _ = fetch_pages(client, "/api/games", {"limit": 2, **filters})
+    assert [game_key(game) for game in games] == expected_games(**filters)
+
+
+def test_venue_games_first_page(client):
+    """The call test_venues.py makes against a running server"""
+    response = client.get("/api/games", params={"limit": 5, "venue_id": 2})
+    games = response.json()
+
+    assert response.status_code == 200
+    assert [game_key(game) for game in games] == expected_games(venue_id=2)[:5]
+    assert all(game["venue_name"] == "South Ground" and game["total_simulations"] == 64 for game in games)
+    assert response.headers["x-next-cursor"]
+
+
+def test_simulations_pages_with_and_without_team(client):
+    names = dict(TEAMS)
+    everything, pages = fetch_pages(client, "/api/simulations", {"limit": 5, "min_results": 110, "max_results": 135})
+    expected = sorted(
+        (names[team_id], run)
+        for team_id, _ in TEAMS for run in range(1, 9)
+        if 110 <= 100 + 7 * team_id + (run * 13) % 40 <= 135
+    )
+    assert [(row["team_name"], row["simulation_run"]) for row in everything] == expected
+    assert pages == -(-len(expected) // 5)
+
+    team_rows, _ = fetch_pages(client, "/api/simulations", {"limit": 3, "team_id": 2})
+    assert [row["simulation_run"] for row in team_rows] == list(range(1, 9))
+
+
+@pytest.mark.parametrize("path, cursor", [
+    ("/api/games", encode_cursor([{"a": 1}, 2])),
+    ("/api/games", encode_cursor(["2024-03-01"])),
+    ("/api/simulations", encode_cursor([["Alpha"], 2])),
+    ("/api/simulations?team_id=1", encode_cursor(["3"])),
+    ("/api/games", base64.urlsafe_b64encode(json.dumps(["2024-03-01", 2.5]).encode()).decode()),
+])
+def test_malformed_cursors_are_rejected(client, path, cursor):
+    response = client.get(path, params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_matching_etag_gets_304(client):
+    response = client.get("/api/teams")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    revalidated = client.get("/api/teams", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert client.get("/api/teams", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_changes_after_data_reload(client, database_path):
+    etag = client.get("/api/teams").headers["etag"]
+
+    conn = sqlite3.connect(database_path)
+    conn.execute("UPDATE metadata SET value = '2' WHERE key = 'data_version'")
+    conn.commit()
+    conn.close()
+    assert client.post("/api/admin/simulation-store/reload").status_code == 200
+
+    response = client.get("/api/teams", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_compressed_bodies_get_a_weak_etag(client, monkeypatch):
+    monkeypatch.setattr(serialization, "COMPRESSION_MIN_BYTES", 100)
+    plain = client.get("/api/simulations", params={"limit": 20}, headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/api/simulations", params={"limit": 20}, headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == "W/" + plain.headers["etag"]
+    assert not plain.headers["etag"].startswith("W/")
+    # The weak form still revalidates
+    assert client.get(
+        "/api/simulations", params={"limit": 20},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]},
+    ).status_code == 304
+
+
+def test_admin_responses_have_no_etag(client):
+    for path in ("/api/admin/result-cache", "/api/admin/simulation-store", "/api/admin/db-pool"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+def post_runs(client, team_id, runs):
+    payload = {"team_id": team_id, "runs": [{"simulation_run": run, "results": result} for run, result in runs]}
+    response = client.post("/api/simulations/runs", json=payload)
+    assert response.status_code == 201
+    return response.json()
+
+
+def exact_win_percentage(team_a, team_b, venue):
+    scores = main.simulation_store
+    return round(simulate_matchup(scores.team_scores(team_a), scores.team_scores(team_b), dict(
+        (venue_id, multiplier) for venue_id, _, multiplier in VENUES
+    )[venue])["home_win_percentage"], 1)
+
+
+def test_derived_data_is_updated_before_the_store_takes_the_new_version(client, database_path, monkeypatch):
+    conn = sqlite3.connect(database_path)
+    build_matchup_matrix(conn)
+    build_team_score_counts(conn)
+    conn.close()
+    client.post("/api/admin/simulation-store/reload")
+    assert main.matchup_matrix.get(1, 2, 2, data_version=1) is not None
+
+    seen = {}
+    add_runs = main.simulation_store.add_runs
+
+    def checked_add_runs(team_id, results, data_version):
+        # Anything that reads the new version must already see the new runs
+        seen["matrix_entry"] = main.matchup_matrix.get(1, 2, 2)
+        seen["stats_runs"] = main.team_stats.get(1).runs
+        return add_runs(team_id, results, data_version)
+
+    monkeypatch.setattr(main.simulation_store, "add_runs", checked_add_runs)
+    result = post_runs(client, 1, [(9, 300), (10, 310)])
+
+    assert seen == {"matrix_entry": None, "stats_runs": 10}
+    assert result["total_runs"] == 10 and result["data_version"] == 2
+    assert result["invalidated_matchups"] == (2 * len(TEAMS) - 1) * len(VENUES)
+    response = client.post("/api/simulations/simulate-match", json={"team_a": 1, "team_b": 2, "venue": 2})
+    assert response.json()["home_win_percentage"] == exact_win_percentage(1, 2, 2)
+    assert client.get("/api/teams/1/stats").json()["max"] == 310
+
+
+def test_runs_written_by_another_worker_trigger_a_reload(client, database_path):
+    # Another process appends runs, so the database is one version ahead of this store
+    conn = sqlite3.connect(database_path)
+    assert append_simulation_runs(conn, 0, [9], [250]) == 2
+    conn.close()
+
+    result = post_runs(client, 3, [(9, 260)])
+
+    assert result["data_version"] == main.simulation_store.data_version == 3
+    assert main.simulation_store.team_scores(0)[-1] == 250
+    assert main.simulation_store.team_scores(3)[-1] == 260
+    assert client.get("/api/teams/0/stats").json()["runs"] == 9
+    response = client.post("/api/simulations/simulate-match", json={"team_a": 0, "team_b": 3, "venue": 1})
+    assert response.json()["home_win_percentage"] == exact_win_percentage(0, 3, 1)
+
+
+def parse_events(body):
+    """(event, data) pairs from a text/event-stream body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_match_stream_sends_start_progress_then_result(client):
+    response = client.get(
+        "/api/simulations/simulate-match/stream",
+        params={"team_a": 1, "team_b": 2, "venue": 2, "chunk_runs": 3},
+        headers={"If-None-Match": "*"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "etag" not in response.headers
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["start", "progress", "progress", "result"]
+    assert events[0][1]["total_runs"] == events[0][1]["away_runs"] == 8
+    assert [data["processed_runs"] for _, data in events[1:]] == [3, 6, 8]
+    assert round(events[-1][1]["home_win_percentage"], 1) == exact_win_percentage(1, 2, 2)
+
+
+def test_match_stream_without_home_runs_still_ends_with_a_result(client, database_path):
+    conn = sqlite3.connect(database_path)
+    conn.execute("INSERT INTO teams (id, name) VALUES (4, 'Empty')")
+    conn.commit()
+    conn.close()
+    assert client.post("/api/admin/simulation-store/reload").status_code == 200
+
+    response = client.get("/api/simulations/simulate-match/stream", params={"team_a": 4, "team_b": 2, "venue": 1})
+
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["start", "result"]
+    assert events[-1][1]["processed_runs"] == events[-1][1]["total_runs"] == 0
+    assert events[-1][1]["home_win_percentage"] == 0.0
+
+
+def test_match_stream_stops_when_the_client_disconnects(client, monkeypatch):
+    """Driven through the whole middleware stack with a client that leaves after one update"""
+    computed = []
+
+    def counting_progress(*args, **kwargs):
+        for update in iter_matchup_progress(*args, **kwargs):
+            computed.append(update["processed_runs"])
+            yield update
+
+    monkeypatch.setattr(main, "iter_matchup_progress", counting_progress)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/simulations/simulate-match/stream", "raw_path": b"",
+        "query_string": b"team_a=1&team_b=2&venue=2&chunk_runs=1", "headers": [], "server": ("test", 80),
+        "client": ("test", 1234), "root_path": "",
+    }
+    chunks = []
+
+    async def stream():
+        disconnected = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"])
+                if len(chunks) == 2:
+                    disconnected.set()
+
+        await asyncio.wait_for(main.app(scope, receive, send), timeout=10)
+
+    asyncio.run(stream())
+
+    events = [name for name, _ in parse_events(b"".join(chunks).decode())]
+    assert events[:2] == ["start", "progress"]
+    # Eight runs make eight updates; the stream ended well before the result
+    assert "result" not in events and len(events) < 8
+    # No further chunks are computed once the client has gone
+    assert len(computed) < 8
+
+
+@pytest.mark.parametrize("body, status", [
+    ('{"team_a": 1, "team_b": 2, "multipliers": [1.0, NaN]}', 400),
+    ('{"team_a": 1, "team_b": 2, "multipliers": [Infinity]}', 400),
+    ('{"team_a": 1, "team_b": 2, "multiplier_min": NaN}', 400),
+    ('{"team_a": 1, "team_b": 2, "multiplier_max": Infinity}', 400),
+    ('{"team_a": 1, "team_b": 2, "multiplier_min": -0.5}', 400),
+])
+def test_sweep_rejects_non_finite_multipliers(client, body, status):
+    response = client.post(
+        "/api/simulations/simulate-match/sweep", content=body, headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == status
+
+
+def test_team_stats_keep_every_requested_quantile(client):
+    response = client.get("/api/teams/1/stats", params={"quantiles": [0.02, 0.025, 0.025]})
+    assert response.status_code == 200
+    assert set(response.json()["quantiles"]) == {"p02", "p2.5"}
+
+    response = client.get("/api/teams/1/stats", params={"quantiles": [0.5, 0.5 + 1e-12]})
+    assert response.status_code == 400
+
+
+def test_only_seeded_season_simulations_are_cached(client):
+    entries = main.result_cache.stats()["entries"]
+    for _ in range(3):
+        response = client.post("/api/simulations/simulate-season", json={"seasons": 20})
+        assert response.status_code == 200
+    assert main.result_cache.stats()["entries"] == entries
+
+    seeded = [client.post("/api/simulations/simulate-season", json={"seasons": 20, "seed": 7}).json() for _ in range(2)]
+    assert seeded[0] == seeded[1]
+    assert main.result_cache.stats()["entries"] == entries + 1
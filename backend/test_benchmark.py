@@ -0,0 +1,28 @@
+import csv
+
+from benchmark import compare, write_dataset
+
+
+def test_synthetic_dataset_has_requested_shape(tmp_path):
+    write_dataset(tmp_path, teams=5, runs_per_team=3, venues=2, games=8)
+
+    with open(tmp_path / "simulations.csv", newline="") as file:
+        simulations = list(csv.DictReader(file))
+    with open(tmp_path / "games.csv", newline="") as file:
+        games = list(csv.DictReader(file))
+
+    assert len(simulations) == 15
+    assert {row["team_id"] for row in simulations} == {"0", "1", "2", "3", "4"}
+    assert len({(game["home_team"], game["away_team"], game["date"]) for game in games}) == 8
+    assert all(game["home_team"] != game["away_team"] for game in games)
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    baseline = {"datasets": {"small": {"get_games": {"median_ms": 10.0}, "simulate_match": {"median_ms": 2.0}}}}
+    results = {"datasets": {"small": {
+        "get_games": {"median_ms": 12.0},
+        "simulate_match": {"median_ms": 3.0},
+        "get_simulations": {"median_ms": 50.0},
+    }}}
+
+    assert compare(results, baseline, tolerance=0.25) == [("small", "simulate_match", 2.0, 3.0)]
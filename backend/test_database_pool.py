@@ -0,0 +1,129 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from database import ConnectionPool, Database
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """Small WAL-mode database file with one table"""
+    path = tmp_path / "pool.db"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    conn.executemany("INSERT INTO teams VALUES (?, ?)", [(0, "Alpha"), (1, "Beta")])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_pool_connections_are_read_only(database_path):
+    """Pooled connections refuse writes"""
+    pool = ConnectionPool(database_path, size=2)
+    with pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO teams VALUES (2, 'Gamma')")
+    pool.close()
+
+
+def test_pool_is_bounded_and_counts_saturation(database_path):
+    """A second borrower waits while the only connection is in use"""
+    pool = ConnectionPool(database_path, size=1)
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold_connection():
+        with pool.connection():
+            borrowed.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_connection)
+    holder.start()
+    borrowed.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection():
+        pass
+    holder.join()
+
+    stats = pool.stats()
+    assert stats["open_connections"] == 1
+    assert stats["saturated_acquisitions"] == 1
+    assert stats["max_wait_seconds"] > 0
+    pool.close()
+
+
+def test_queries_run_concurrently_off_the_event_loop(database_path):
+    """fetch_all is awaitable and many queries can be in flight at once"""
+    database = Database(database_path, pool_size=4)
+
+    async def run_queries():
+        return await asyncio.gather(*[
+            database.fetch_all("SELECT name FROM teams ORDER BY id") for _ in range(20)
+        ])
+
+    results = asyncio.run(run_queries())
+    assert all([row["name"] for row in rows] == ["Alpha", "Beta"] for rows in results)
+    assert database.stats()["pool"]["acquisitions"] == 20
+    database.close()
+
+
+def test_connections_busy_at_close_are_closed_when_returned(database_path):
+    """close() retires borrowed connections; the pool reopens on the next borrow"""
+    pool = ConnectionPool(database_path, size=1)
+    with pool.connection() as conn:
+        pool.close()
+        assert conn.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 2
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.stats()["open_connections"] == 0
+    with pool.connection() as reopened:
+        assert reopened is not conn
+        assert reopened.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 2
+    pool.close()
+    assert pool.stats()["open_connections"] == 0
+
+
+def test_waiter_gets_the_slot_of_a_retired_connection(database_path):
+    """A borrower blocked on a full pool is not stranded when close() retires the busy connection"""
+    pool = ConnectionPool(database_path, size=1, timeout=5)
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold_connection():
+        with pool.connection():
+            borrowed.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_connection)
+    holder.start()
+    borrowed.wait()
+    pool.close()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT name FROM teams WHERE id = 1").fetchone()[0] == "Beta"
+    holder.join()
+
+    assert pool.stats()["max_wait_seconds"] < 5
+    pool.close()
+
+
+def test_dedicated_connections_leave_the_pool_free(database_path):
+    """Long reads on dedicated connections do not use up pooled ones"""
+    pool = ConnectionPool(database_path, size=1, timeout=0.05)
+    with pool.dedicated_connection() as first, pool.dedicated_connection() as second:
+        assert pool.stats()["dedicated_in_use"] == 2
+        with pool.connection() as pooled:
+            assert pooled.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 2
+        assert first.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            second.execute("DELETE FROM teams")
+
+    stats = pool.stats()
+    assert (stats["dedicated_in_use"], stats["saturated_acquisitions"], stats["open_connections"]) == (0, 0, 1)
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT 1")
+    pool.close()
@@ -0,0 +1,29 @@
+import csv
+import io
+import json
+
+import exports
+from matchup_engine import match_outcomes
+
+
+def test_outcome_stream_is_chunked_and_complete(monkeypatch):
+    """Every pairing is streamed, and no chunk holds more than the chunk size"""
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 6)
+    home_results = [100, 120, 150, 90, 130]
+    away_results = [110, 120, 140]
+
+    chunks = list(exports.stream_matchup_outcomes(home_results, away_results, 1.2, "ndjson"))
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+    assert all(len(chunk.splitlines()) <= 6 for chunk in chunks)
+    assert [row["total_score"] for row in rows] == match_outcomes(home_results, away_results, 1.2)
+    assert sum(row["home_win"] for row in rows) == sum(
+        home * 1.2 > away for home in home_results for away in away_results
+    )
+
+
+def test_outcome_stream_csv_has_single_header():
+    chunks = exports.stream_matchup_outcomes([100, 120], [110], 1.0, "csv")
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == exports.OUTCOME_EXPORT_COLUMNS
+    assert [row[:2] for row in rows[1:]] == [["100", "110"], ["120", "110"]]
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+import ingest
+from migrations import migrate
+
+SIMULATIONS_CSV = (
+    "team_id,team,simulation_run,results\n"
+    "1,Hull Stars,1,130\n"
+    "0,Peterborough Strikers,1,141\n"
+    "0,Peterborough Strikers,2,154\n"
+    "1,Hull Stars (renamed),2,170\n"
+    "2,Rochdale Hurricanes,1,120\n"
+    "0,Peterborough Strikers,1,99\n"
+    "2,Rochdale Hurricanes,2,160\n"
+)
+
+
+def load(path, chunk_rows):
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    teams, rows = ingest.ingest_simulations(conn.cursor(), str(path), chunk_rows)
+    tables = (
+        conn.execute("SELECT id, name FROM teams ORDER BY id").fetchall(),
+        conn.execute("SELECT team_id, simulation_run, results FROM simulations ORDER BY id").fetchall(),
+    )
+    return teams, rows, tables
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "simulations.csv"
+    path.write_text(SIMULATIONS_CSV)
+    return path
+
+
+def test_csv_ingest_keeps_first_names_and_last_results(csv_path, monkeypatch):
+    """Chunk boundaries do not change which name or result wins"""
+    monkeypatch.setattr(ingest, "pyarrow", None)
+    teams, rows, (team_rows, simulation_rows) = load(csv_path, chunk_rows=2)
+
+    assert rows == 7
+    assert teams == {1: "Hull Stars", 0: "Peterborough Strikers", 2: "Rochdale Hurricanes"}
+    assert team_rows == [(0, "Peterborough Strikers"), (1, "Hull Stars"), (2, "Rochdale Hurricanes")]
+    assert simulation_rows == [(1, 1, 130), (0, 1, 99), (0, 2, 154), (1, 2, 170), (2, 1, 120), (2, 2, 160)]
+    assert load(csv_path, chunk_rows=1000)[2] == (team_rows, simulation_rows)
+
+
+def test_columnar_inputs_produce_the_same_tables(csv_path, tmp_path, monkeypatch):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.csv
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    table = pyarrow.csv.read_csv(csv_path)
+    pyarrow.parquet.write_table(table, tmp_path / "simulations.parquet", row_group_size=3)
+    pyarrow.feather.write_feather(table, tmp_path / "simulations.arrow", chunksize=4)
+
+    expected = load(csv_path, chunk_rows=2)  # pyarrow CSV reader
+    monkeypatch.setattr(ingest, "pyarrow", None)
+    assert load(csv_path, chunk_rows=2) == expected
+    monkeypatch.setattr(ingest, "pyarrow", pyarrow)
+    assert load(tmp_path / "simulations.parquet", chunk_rows=2) == expected
+    assert load(tmp_path / "simulations.arrow", chunk_rows=2) == expected
+    assert ingest.find_simulations_input(str(tmp_path)).endswith("simulations.parquet")
+
+
+def test_appended_runs_mark_only_the_team_stale():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'Home'), (1, 'Away'), (2, 'Other');
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES (0, 1, 100), (1, 1, 120);
+        INSERT INTO metadata VALUES ('data_version', '4'), ('matchup_matrix_version', '4');
+        INSERT INTO matchup_matrix VALUES (0, 1, 0, 50, 1, 1, 1), (1, 0, 0, 50, 1, 1, 1), (1, 2, 0, 50, 1, 1, 1);
+    """)
+
+    assert ingest.append_simulation_runs(conn, 0, [2, 3], [140, 90]) == 5
+    assert conn.execute("SELECT simulation_run, results FROM simulations WHERE team_id = 0 ORDER BY id").fetchall() == [
+        (1, 100), (2, 140), (3, 90)
+    ]
+    assert conn.execute("SELECT team_id FROM matchup_matrix_stale_teams").fetchall() == [(0,)]
+    assert conn.execute("SELECT value FROM metadata WHERE key = 'matchup_matrix_version'").fetchone() == ("5",)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        ingest.append_simulation_runs(conn, 1, [2, 1], [130, 150])
+    assert conn.execute("SELECT COUNT(*) FROM simulations WHERE team_id = 1").fetchone() == (1,)
+    assert conn.execute("SELECT value FROM metadata WHERE key = 'data_version'").fetchone() == ("5",)
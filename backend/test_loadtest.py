@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from loadtest import drive_load, parse_mix, percentile, summarize
+
+
+def make_app():
+    """Stand-in for the API with the endpoints the load mix calls"""
+    app = FastAPI()
+
+    @app.get("/api/teams")
+    async def teams():
+        return [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+
+    @app.get("/api/venues")
+    async def venues():
+        return [{"id": 7, "name": "Ground", "home_multiplier": 1.1}]
+
+    @app.get("/api/games")
+    async def games(team_id: int, limit: int):
+        return []
+
+    @app.post("/api/simulations/simulate-match")
+    async def simulate_match(body: dict):
+        if body["team_a"] == body["team_b"]:
+            raise HTTPException(status_code=400, detail="Same team")
+        return {"home_win_percentage": 50.0}
+
+    @app.get("/api/simulations")
+    async def simulations(team_id: int, limit: int):
+        return []
+
+    return app
+
+
+def test_parse_mix():
+    assert parse_mix("games=1, simulate_match=2.5") == {"games": 1.0, "simulate_match": 2.5}
+    assert parse_mix("simulations") == {"simulations": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("teams=1")
+    with pytest.raises(ValueError):
+        parse_mix("games=0")
+
+
+def test_summarize_counts_errors_and_percentiles():
+    records = [(0.001 * i, 200) for i in range(1, 101)] + [(0.5, 500), (0.2, "ConnectError")]
+    stats = summarize(records, seconds=10)
+
+    assert stats["requests"] == 102
+    assert stats["errors"] == 2
+    assert stats["error_rate"] == round(2 / 102, 4)
+    assert stats["throughput_rps"] == 10.0
+    assert stats["statuses"] == {"200": 100, "500": 1, "ConnectError": 1}
+    assert (stats["p50_ms"], stats["p99_ms"], stats["max_ms"]) == (51.0, 99.0, 100.0)
+    assert percentile([1, 2, 3], 0.0) == 1
+
+
+def test_drive_load_reports_every_request_type():
+    transport = httpx.ASGITransport(app=make_app())
+    mix = parse_mix("games=1,simulate_match=1,simulations=1")
+
+    report = asyncio.run(drive_load("http://test", mix, concurrency=4, duration=0.3, warmup=0.05, transport=transport))
+
+    assert set(report["endpoints"]) == set(mix)
+    assert report["overall"]["requests"] == sum(stats["requests"] for stats in report["endpoints"].values())
+    assert all(stats["requests"] > 0 for stats in report["endpoints"].values())
+    # Same-team matchups are rejected by the stand-in app and show up as errors
+    simulate = report["endpoints"]["simulate_match"]
+    assert 0 < simulate["errors"] < simulate["requests"]
+    assert report["endpoints"]["games"]["errors"] == 0
@@ -0,0 +1,73 @@
+import sqlite3
+
+from matchup_batch import evaluate_matchups, iter_matchup_summaries, shutdown_process_pool
+from matchup_engine import simulate_matchup
+from migrations import migrate
+from simulation_store import SimulationStore
+
+
+def make_store():
+    """Store with three teams and two venues"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'A'), (1, 'B'), (2, 'C');
+        INSERT INTO venues VALUES (0, 'Lady''s', 1.0), (1, 'The Square', 1.32);
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 140), (0, 2, 120), (1, 1, 130), (1, 2, 160), (2, 1, 100), (2, 2, 150);
+    """)
+    store = SimulationStore()
+    store.load(conn)
+    return store
+
+
+class CountingMatrix:
+    """Matrix stand-in that knows one entry and records lookups"""
+
+    def __init__(self):
+        self.lookups = []
+
+    def get(self, home_team_id, away_team_id, venue_id, data_version=None):
+        self.lookups.append((home_team_id, away_team_id, venue_id))
+        if (home_team_id, away_team_id, venue_id) == (2, 0, 0):
+            return {"home_win_percentage": 12.5}
+        return None
+
+
+def test_duplicate_matchups_are_computed_once():
+    """Repeated triples are looked up once and precomputed entries are reused"""
+    store = make_store()
+    matrix = CountingMatrix()
+    keys = [(0, 1, 0), (0, 1, 0), (1, 0, 1), (2, 0, 0), (0, 1, 0)]
+
+    results = evaluate_matchups(store, keys, matrix=matrix)
+
+    assert sorted(matrix.lookups) == [(0, 1, 0), (1, 0, 1), (2, 0, 0)]
+    assert results[(2, 0, 0)] == {"home_win_percentage": 12.5}
+    assert results[(1, 0, 1)] == simulate_matchup([130, 160], [120, 140], 1.32)
+
+
+def test_process_pool_matches_serial():
+    """Splitting the work across processes gives the same answers"""
+    store = make_store()
+    keys = [(home, away, venue) for home in range(3) for away in range(3) for venue in range(2)]
+    try:
+        pooled = evaluate_matchups(store, keys, use_process_pool=True)
+    finally:
+        shutdown_process_pool()
+    assert pooled == evaluate_matchups(store, keys, use_process_pool=False)
+
+
+def test_summaries_keep_request_order_across_chunks():
+    """Chunked and unchunked batches give the same summaries in request order"""
+    store = make_store()
+    keys = [(1, 0, 1), (0, 1, 0), (2, 1, 0), (1, 0, 1)]
+
+    summaries = list(iter_matchup_summaries(store, keys))
+
+    assert [(s["team_a"], s["team_b"], s["venue"]) for s in summaries] == keys
+    assert summaries[0] == summaries[3]
+    assert summaries[0]["home_win_percentage"] == round(
+        simulate_matchup([130, 160], [120, 140], 1.32)["home_win_percentage"], 1
+    )
+    assert list(iter_matchup_summaries(store, keys, chunk_size=3)) == summaries
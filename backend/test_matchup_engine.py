@@ -0,0 +1,234 @@
+import random
+
+import numpy as np
+import pytest
+
+import matchup_engine
+from matchup_engine import (
+    break_even_multiplier,
+    combine_histograms,
+    count_home_wins,
+    convolve_counts,
+    generate_team_histogram,
+    match_outcomes,
+    matchup_histogram,
+    quantile_edges,
+    sample_matchup,
+    score_distribution,
+    simulate_matchup,
+    sorted_value_counts,
+    win_counts_at_multipliers,
+    win_thresholds,
+)
+
+
+def reference_matchup(home_results, away_results, home_multiplier):
+    """Original nested-loop implementation from simulate_match"""
+    outcomes = []
+    home_wins = 0
+    total_simulations = 0
+    for home_score in home_results:
+        for away_score in away_results:
+            adjusted_home = home_score * home_multiplier
+            outcomes.append(adjusted_home + away_score)
+            total_simulations += 1
+            if adjusted_home > away_score:
+                home_wins += 1
+    return home_wins, total_simulations, outcomes
+
+
+def test_matchup_matches_nested_loop():
+    """Vectorized win counting must agree with the nested loop, ties included"""
+    rng = random.Random(42)
+    for home_multiplier in [0.84, 1, 1.0, 1.32, 0.97, 1.25]:
+        home_results = [rng.randint(90, 200) for _ in range(60)]
+        away_results = [rng.randint(90, 200) for _ in range(45)]
+        # Force exact ties at a multiplier of 1
+        away_results[:10] = home_results[:10]
+
+        home_wins, total_simulations, outcomes = reference_matchup(home_results, away_results, home_multiplier)
+        matchup = simulate_matchup(home_results, away_results, home_multiplier)
+
+        assert matchup["home_wins"] == home_wins
+        assert matchup["total_simulations"] == total_simulations
+        assert match_outcomes(home_results, away_results, home_multiplier) == outcomes
+
+
+def test_histogram_matches_pairwise_binning():
+    """Per-team histograms scaled by the opponent's run count match pairwise binning"""
+    home_results = [131, 154, 141, 157, 99, 100]
+    away_results = [120, 175, 101]
+    home_multiplier = 1.32
+
+    pairwise_bins = {}
+    for home_score in home_results:
+        for _ in away_results:
+            key = int(home_score * home_multiplier // 10) * 10
+            pairwise_bins[key] = pairwise_bins.get(key, 0) + 1
+
+    histogram = generate_team_histogram(
+        [score * home_multiplier for score in home_results], len(away_results), "Home"
+    )
+    for item in histogram:
+        start = int(item["range"].split("-")[0])
+        assert item["count"] == pairwise_bins.get(start, 0)
+    assert sum(item["count"] for item in histogram) == len(home_results) * len(away_results)
+
+
+def test_combined_histogram_is_in_numeric_order():
+    """Ranges sort by their start score, so 100-109 follows 90-99"""
+    home = generate_team_histogram([95, 104, 117], 1, "Home")
+    away = generate_team_histogram([88, 99], 1, "Away")
+    ranges = [item["range"] for item in combine_histograms(home, away)]
+    assert ranges == ["80-89", "90-99", "100-109", "110-119"]
+
+
+def test_matchup_histogram_matches_per_run_histograms():
+    """Histograms from (value, count) pairs equal binning every run, for any bin size"""
+    rng = random.Random(3)
+    home_results = sorted(rng.randint(80, 220) for _ in range(50))
+    away_results = sorted(rng.randint(80, 220) for _ in range(35))
+    for bin_size in (1, 7, 10, 25):
+        expected = combine_histograms(
+            generate_team_histogram([score * 1.25 for score in home_results], len(away_results), "Home", bin_size),
+            generate_team_histogram(away_results, len(home_results), "Away", bin_size),
+        )
+        histogram = matchup_histogram(
+            sorted_value_counts(home_results), sorted_value_counts(away_results), 1.25, "Home", "Away", bin_size=bin_size
+        )
+        assert histogram == expected
+
+
+def test_quantile_histogram_has_equal_count_bins():
+    """Quantile bins cover every pairing in contiguous ranges of similar weight"""
+    rng = np.random.default_rng(5)
+    home_results = np.sort(rng.integers(80, 220, 400))
+    away_results = np.sort(rng.integers(60, 200, 300))
+    histogram = matchup_histogram(
+        sorted_value_counts(home_results), sorted_value_counts(away_results), 1.1, "Home", "Away",
+        binning="quantile", bins=8,
+    )
+    assert len(histogram) == 8
+    assert sum(item["home_team"] for item in histogram) == 400 * 300
+    assert sum(item["away_team"] for item in histogram) == 400 * 300
+
+    totals = [item["home_team"] + item["away_team"] for item in histogram]
+    assert max(totals) < 1.5 * min(totals)
+    bounds = [tuple(map(int, item["range"].split("-"))) for item in histogram]
+    assert all(end + 1 == next_start for (_, end), (next_start, _) in zip(bounds, bounds[1:]))
+
+
+def test_quantile_edges_never_split_tied_scores():
+    """Quantiles landing on one heavily tied score collapse into a single bin"""
+    edges = quantile_edges([(np.array([100.0, 101.0, 140.0]), np.array([98, 1, 1]))], 4)
+    assert edges.tolist() == [100, 141]
+    edges = quantile_edges([(np.array([100.0, 101.0, 140.0]), np.array([50, 25, 25]))], 4)
+    assert edges.tolist() == [100, 101, 140, 141]
+
+
+def test_empty_team_has_no_simulations():
+    """A team without simulation runs yields an empty matchup"""
+    matchup = simulate_matchup([], [120, 130], 1.0)
+    assert matchup["total_simulations"] == 0
+    assert matchup["home_win_percentage"] == 0
+    assert combine_histograms([], generate_team_histogram([], 0, "Away")) == []
+    empty = sorted_value_counts([])
+    assert matchup_histogram(empty, sorted_value_counts([120, 130]), 1.0, "Home", "Away", binning="quantile") == []
+
+
+def test_score_distribution_matches_raw_outcomes():
+    """Binned totals from the convolution equal binning every raw pairing"""
+    rng = random.Random(7)
+    home_results = [rng.randint(80, 220) for _ in range(70)]
+    away_results = [rng.randint(80, 220) for _ in range(55)]
+    for home_multiplier in [0.84, 1.0, 1.32]:
+        for bin_size in [1, 10, 25]:
+            outcomes = match_outcomes(home_results, away_results, home_multiplier)
+            expected = {}
+            for total in outcomes:
+                key = int(total // bin_size) * bin_size
+                expected[key] = expected.get(key, 0) + 1
+
+            distribution = score_distribution(home_results, away_results, home_multiplier, bin_size)
+            actual = {int(b["range"].split("-")[0]): b["count"] for b in distribution["bins"] if b["count"]}
+            assert actual == expected
+            assert distribution["total"] == len(outcomes)
+            assert distribution["quantiles"]["p50"] == int(np.floor(np.quantile(outcomes, 0.5, method="inverted_cdf")))
+
+
+def test_fft_convolution_matches_direct():
+    """The FFT path gives the same integer counts as np.convolve"""
+    rng = np.random.default_rng(3)
+    counts_a = rng.integers(0, 5000, size=900)
+    counts_b = rng.integers(0, 5000, size=700)
+    assert np.array_equal(convolve_counts(counts_a, counts_b), np.convolve(counts_a, counts_b))
+
+
+def test_sampled_matchup_is_seeded_and_brackets_exact_value():
+    """The same seed gives the same estimate and its interval covers the exact win rate"""
+    rng = np.random.default_rng(7)
+    home = rng.integers(80, 220, 5_000)
+    away = rng.integers(80, 220, 5_000)
+    exact = simulate_matchup(home, away, 1.1)
+
+    sampled = sample_matchup(home, away, 1.1, 50_000, seed=3, confidence=0.999)
+
+    assert sampled == sample_matchup(home, away, 1.1, 50_000, seed=3, confidence=0.999)
+    assert sampled["samples"] == 50_000
+    assert sampled["ci_low"] <= exact["home_win_percentage"] <= sampled["ci_high"]
+    assert abs(sampled["avg_home_score"] - exact["avg_home_score"]) < 1
+
+
+def test_sampled_matchup_stops_at_target_interval_width():
+    rng = np.random.default_rng(8)
+    home = rng.integers(80, 220, 1_000)
+    away = rng.integers(80, 220, 1_000)
+
+    sampled = sample_matchup(home, away, 1.0, 1_000_000, seed=1, target_ci_width=2)
+
+    assert sampled["samples"] < 1_000_000
+    assert sampled["ci_high"] - sampled["ci_low"] <= 2
+
+
+@pytest.mark.parametrize("max_pairs", [matchup_engine.MAX_SWEEP_PAIRS, 0])
+def test_multiplier_sweep_matches_each_multiplier_on_its_own(monkeypatch, max_pairs):
+    monkeypatch.setattr(matchup_engine, "SWEEP_BLOCK_CELLS", 50)
+    monkeypatch.setattr(matchup_engine, "MAX_SWEEP_PAIRS", max_pairs)
+    rng = np.random.default_rng(11)
+    home = np.sort(rng.integers(0, 60, 400))
+    away = np.sort(rng.integers(0, 60, 300))
+    # Multipliers that land exactly on, or a rounding error off, many score ratios
+    multipliers = [0.0, 0.5, 0.8, 0.9, 1.0, 1.05, 1.1, 1.2, 1.3, 1.5, 3.0, 0.1 + 0.2, 1 / 3]
+
+    wins = win_counts_at_multipliers(sorted_value_counts(home), sorted_value_counts(away), multipliers)
+
+    assert wins.tolist() == [count_home_wins(home, away, multiplier) for multiplier in multipliers]
+
+
+def test_win_thresholds_are_exact_float_boundaries():
+    home = np.arange(1, 80)
+    away = np.arange(0, 120)
+
+    thresholds = win_thresholds(home, away)
+
+    assert (home[:, None] * thresholds > away[None, :]).all()
+    assert (home[:, None] * np.nextafter(thresholds, -np.inf) <= away[None, :]).all()
+
+
+def test_break_even_multiplier_is_where_home_wins_reach_half():
+    rng = np.random.default_rng(12)
+    home = np.sort(rng.integers(60, 160, 500))
+    away = np.sort(rng.integers(80, 200, 400))
+    needed = len(home) * len(away) / 2
+
+    multiplier = break_even_multiplier(sorted_value_counts(home), sorted_value_counts(away))
+
+    assert count_home_wins(home, away, multiplier * (1 + 1e-9)) >= needed
+    assert count_home_wins(home, away, multiplier * (1 - 1e-9)) < needed
+
+
+def test_break_even_multiplier_is_none_when_half_is_out_of_reach():
+    home = np.array([0, 0, 0, 50])
+    away = np.array([10, 20])
+    assert break_even_multiplier(sorted_value_counts(home), sorted_value_counts(away)) is None
+    assert break_even_multiplier(sorted_value_counts(np.array([0, 50])), sorted_value_counts(away)) == pytest.approx(0.4)
@@ -0,0 +1,74 @@
+import sqlite3
+
+from data_version import bump_data_version
+from matchup_matrix import MatchupMatrix, build_matchup_matrix, matchup_matrix_is_complete
+from migrations import migrate
+
+
+def make_connection():
+    """Migrated in-memory database with two teams and one venue"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'Home'), (1, 'Away');
+        INSERT INTO venues VALUES (0, 'The Square', 1.5);
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 100), (0, 2, 60), (1, 1, 120), (1, 2, 90);
+    """)
+    bump_data_version(conn.cursor())
+    return conn
+
+
+def test_matrix_covers_every_combination():
+    """Every (home, away, venue) triple is materialized with exact win rates"""
+    conn = make_connection()
+    assert build_matchup_matrix(conn) == 4
+
+    matrix = MatchupMatrix()
+    matrix.load(conn, data_version=1)
+    entry = matrix.get(0, 1, 0)
+    assert matrix.get(0, 1, 0, data_version=1) == entry
+    assert matrix.get(0, 1, 0, data_version=2) is None
+    # Adjusted home scores are 150 and 90: 150 beats both, 90 beats neither (ties lose)
+    assert entry["home_win_percentage"] == 50.0
+    assert entry["avg_home_score"] == 120.0
+    assert entry["total_simulations"] == 4
+
+
+def test_matrix_is_ignored_after_data_reload():
+    """A matrix built for an older data version is not served"""
+    conn = make_connection()
+    build_matchup_matrix(conn)
+    bump_data_version(conn.cursor())
+
+    matrix = MatchupMatrix()
+    matrix.load(conn, data_version=2)
+    assert matrix.get(0, 1, 0) is None
+
+
+def test_invalidating_a_team_keeps_other_entries():
+    """Only entries with the team at home or away are dropped, whatever the venue ID"""
+    matrix = MatchupMatrix()
+    matrix.entries = {(0, 1, 2): {}, (1, 0, 2): {}, (1, 2, 0): {}, (2, 1, 0): {}, (2, 3, 0): {}}
+    assert matrix.invalidate_team(0, team_ids=[0, 1, 2, 3], venue_ids=[0, 2], data_version=7) == 2
+    assert sorted(matrix.entries) == [(1, 2, 0), (2, 1, 0), (2, 3, 0)]
+    assert matrix.data_version == 7
+
+
+def test_matrix_completeness_tracks_version_and_entries():
+    conn = make_connection()
+    assert not matchup_matrix_is_complete(conn)
+    build_matchup_matrix(conn)
+    assert matchup_matrix_is_complete(conn)
+    conn.execute("INSERT INTO matchup_matrix_stale_teams VALUES (1)")
+    assert not matchup_matrix_is_complete(conn)
+
+    matrix = MatchupMatrix()
+    matrix.load(conn, data_version=1)
+    assert matrix.get(0, 1, 0) is None and matrix.get(1, 0, 0) is None
+    assert matrix.get(0, 0, 0) is not None
+
+    build_matchup_matrix(conn)
+    assert matchup_matrix_is_complete(conn)
+    conn.execute("DELETE FROM matchup_matrix WHERE home_team_id = 0")
+    assert not matchup_matrix_is_complete(conn)
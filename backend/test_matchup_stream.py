@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from matchup_engine import matchup_histogram, simulate_matchup, sorted_value_counts
+from matchup_stream import iter_matchup_progress, sse_event, stratified_chunks
+
+
+def test_stratified_chunks_cover_every_run_once():
+    scores = np.arange(23, dtype=np.int32)
+    chunks = list(stratified_chunks(scores, chunk_runs=5))
+
+    assert len(chunks) == 5
+    assert all(len(chunk) <= 5 for chunk in chunks)
+    assert sorted(np.concatenate(chunks).tolist()) == scores.tolist()
+    # Every chunk spans the whole range rather than one end of it
+    assert all(chunk[0] < 5 and chunk[-1] >= 18 for chunk in chunks)
+
+
+def test_stratified_chunks_of_short_arrays():
+    assert [chunk.tolist() for chunk in stratified_chunks(np.array([3, 7], dtype=np.int32), 10)] == [[3, 7]]
+    assert list(stratified_chunks(np.array([], dtype=np.int32), 10)) == []
+
+
+def test_progress_converges_to_the_exact_result():
+    rng = np.random.default_rng(3)
+    home = np.sort(rng.integers(60, 160, 1_000)).astype(np.int32)
+    away = np.sort(rng.integers(60, 160, 700)).astype(np.int32)
+
+    updates = list(iter_matchup_progress(home, away, 1.1, "Home", "Away", chunk_runs=64))
+    exact = simulate_matchup(home, away, 1.1)
+
+    assert len(updates) == 16
+    assert [update["processed_runs"] for update in updates] == sorted({update["processed_runs"] for update in updates})
+    final = updates[-1]
+    assert final["processed_runs"] == final["total_runs"] == 1_000
+    assert final["home_wins"] == exact["home_wins"]
+    assert final["home_win_percentage"] == round(exact["home_win_percentage"], 2)
+    assert final["histogram_data"] == matchup_histogram(
+        sorted_value_counts(home), sorted_value_counts(away), 1.1, "Home", "Away"
+    )
+    # The interleaved chunks keep even the first estimate close to the answer
+    assert abs(updates[0]["home_win_percentage"] - exact["home_win_percentage"]) < 5
+
+
+def test_partial_histogram_weights_the_runs_seen_so_far():
+    home = np.array([100, 110, 120, 130], dtype=np.int32)
+    away = np.array([105, 125], dtype=np.int32)
+
+    first = next(iter_matchup_progress(home, away, 1.0, "Home", "Away", chunk_runs=2))
+    home_total = sum(row["home_team"] for row in first["histogram_data"])
+    away_total = sum(row["away_team"] for row in first["histogram_data"])
+    # Two home runs against two away runs: four pairings from each side
+    assert first["processed_runs"] == 2
+    assert home_total == away_total == 4
+
+
+def test_home_team_without_runs_still_gets_a_final_update():
+    away = np.array([105, 125], dtype=np.int32)
+
+    updates = list(iter_matchup_progress(np.array([], dtype=np.int32), away, 1.0, "Home", "Away"))
+
+    assert len(updates) == 1
+    assert updates[0]["processed_runs"] == updates[0]["total_runs"] == 0
+    assert (updates[0]["home_wins"], updates[0]["home_win_percentage"]) == (0, 0.0)
+
+
+def test_sse_event_format():
+    event = sse_event("progress", {"home_wins": 3})
+    assert event.startswith(b"event: progress\ndata: ")
+    assert event.endswith(b"\n\n")
+    assert json.loads(event.split(b"data: ", 1)[1]) == {"home_wins": 3}
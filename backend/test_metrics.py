@@ -0,0 +1,43 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import Histogram, Metrics, MetricsMiddleware, stage
+from serialization import FastJSONResponse
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(("/a",), value)
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_middleware_labels_by_route_template_and_records_stages():
+    """Path parameters collapse into the route template and stages are attributed to it"""
+    app = FastAPI(default_response_class=FastJSONResponse)
+    metrics = Metrics()
+    app.add_middleware(MetricsMiddleware, router=app.router, metrics=metrics)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with stage("db_fetch"):
+            return {"id": item_id}
+
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+    text = metrics.render()
+    assert 'plutodata_http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'plutodata_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'plutodata_http_requests_in_flight{method="GET",route="/items/{item_id}"} 0' in text
+    assert 'plutodata_http_response_size_bytes_sum{method="GET",route="/items/{item_id}"} 16' in text
+    assert 'plutodata_stage_duration_seconds_count{route="/items/{item_id}",stage="db_fetch"} 2' in text
+    assert 'plutodata_stage_duration_seconds_count{route="/items/{item_id}",stage="serialize"} 2' in text
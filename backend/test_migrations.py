@@ -0,0 +1,75 @@
+import sqlite3
+
+from migrations import (
+    SCHEMA_VERSION,
+    assert_hot_queries_use_indexes,
+    migrate,
+    schema_version,
+)
+
+
+def make_legacy_connection():
+    """Database as the original setup_database.py left it, loaded twice"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+        CREATE TABLE venues (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, home_multiplier REAL NOT NULL);
+        CREATE TABLE simulations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER NOT NULL,
+            simulation_run INTEGER NOT NULL,
+            results INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            home_team TEXT NOT NULL,
+            away_team TEXT NOT NULL,
+            date TEXT NOT NULL,
+            venue_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO teams VALUES (0, 'Hull Stars'), (1, 'Blackpool Sixers');
+        INSERT INTO venues VALUES (0, 'Lady''s', 1.0);
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 140), (1, 1, 150), (0, 1, 140), (1, 1, 150);
+        INSERT INTO games (home_team, away_team, date, venue_id) VALUES
+            ('Hull Stars', 'Blackpool Sixers', '2024-03-23', 0),
+            ('Hull Stars', 'Blackpool Sixers', '2024-03-23', 0);
+    """)
+    return conn
+
+
+def test_migrations_upgrade_legacy_database():
+    """Duplicates are removed and games reference teams by ID"""
+    conn = make_legacy_connection()
+    assert migrate(conn) == SCHEMA_VERSION
+    assert schema_version(conn) == SCHEMA_VERSION
+
+    assert conn.execute("SELECT COUNT(*) FROM simulations").fetchone()[0] == 2
+    assert conn.execute("SELECT home_team_id, away_team_id, date FROM games").fetchall() == [
+        (0, 1, "2024-03-23")
+    ]
+
+    # Running again is a no-op
+    assert migrate(conn) == 0
+
+
+def test_migrate_switches_existing_database_to_wal(tmp_path):
+    """A file created in rollback-journal mode is in WAL mode once migrated"""
+    path = tmp_path / "plutodata.db"
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    migrate(conn)
+    conn.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_hot_queries_use_indexes():
+    """EXPLAIN QUERY PLAN shows every hot query answered from its index"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    assert_hot_queries_use_indexes(conn)
@@ -0,0 +1,35 @@
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, page_rows
+
+
+def test_cursor_round_trip():
+    """Cursors decode back to the sort key they were built from"""
+    cursor = encode_cursor(["2024-05-17", 42])
+    assert decode_cursor(cursor, (str, int)) == ["2024-05-17", 42]
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage!",
+    encode_cursor([1, 2, 3]),
+    encode_cursor({"a": 1}),
+    encode_cursor([{"a": 1}, 2]),
+    encode_cursor(["2024-05-17", "42"]),
+    encode_cursor(["2024-05-17", True]),
+    encode_cursor(["2024-05-17", 4.5]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    """Malformed or mismatched cursors are a 400, not a server error"""
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, (str, int))
+    assert error.value.status_code == 400
+
+
+def test_page_rows_only_returns_cursor_when_more_rows_exist():
+    """The extra fetched row signals a next page and is not returned"""
+    rows = [{"id": i} for i in range(4)]
+    page, cursor = page_rows(rows, 3, lambda row: [row["id"]])
+    assert page == rows[:3]
+    assert decode_cursor(cursor, (int,)) == [2]
+    assert page_rows(rows[:3], 3, lambda row: [row["id"]]) == (rows[:3], None)
@@ -0,0 +1,38 @@
+import time
+
+from result_cache import ResultCache, etag_matches, make_etag
+
+
+def test_lru_eviction_and_counters():
+    """The least recently used entry is evicted once the cache is full"""
+    cache = ResultCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+
+
+def test_entries_expire_after_ttl():
+    """Expired entries count as misses and are dropped"""
+    cache = ResultCache(ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_etag_changes_with_data_version():
+    """A data reload changes every ETag; If-None-Match lists are honoured"""
+    etag = make_etag(1, "/api/games", "limit=5")
+    assert etag != make_etag(2, "/api/games", "limit=5")
+    assert etag != make_etag(1, "/api/games", "limit=6")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,56 @@
+import sqlite3
+
+import numpy as np
+
+import season_simulator
+from matchup_batch import shutdown_process_pool
+from migrations import migrate
+from season_simulator import simulate_season
+from simulation_store import SimulationStore
+
+
+def make_store():
+    """Three teams: A always outscores B and C, who each win half their meetings"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'A'), (1, 'B'), (2, 'C');
+        INSERT INTO venues VALUES (0, 'Lady''s', 1.0);
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 200), (0, 2, 210), (1, 1, 150), (1, 2, 160), (2, 1, 100), (2, 2, 170);
+    """)
+    store = SimulationStore()
+    store.load(conn)
+    return store
+
+
+FIXTURES = [(0, 1, 0), (1, 2, 0), (2, 0, 0), (1, 0, 0), (2, 1, 0), (0, 2, 0)]
+
+
+def test_dominant_teams_finish_in_order():
+    """A team that wins every fixture tops the ladder every season"""
+    result = simulate_season(make_store(), FIXTURES, 500, seed=1, finals_spots=1)
+
+    top, *rest = result["teams"]
+    assert top["team_name"] == "A"
+    assert top["position_probabilities"] == [1.0, 0.0, 0.0]
+    assert top["average_points"] == 8
+    assert [team["finals_probability"] for team in rest] == [0.0, 0.0]
+    assert sum(team["average_points"] for team in rest) == 4
+
+
+def test_results_depend_only_on_seed(monkeypatch):
+    """Chunks are seeded from the base seed, so serial and pooled runs agree"""
+    monkeypatch.setattr(season_simulator, "SEASON_CHUNK", 64)
+    store = make_store()
+    serial = simulate_season(store, FIXTURES, 300, seed=5, use_process_pool=False)
+    try:
+        pooled = simulate_season(store, FIXTURES, 300, seed=5, use_process_pool=True)
+    finally:
+        shutdown_process_pool()
+
+    assert pooled == serial
+    other_seed = simulate_season(store, FIXTURES, 300, seed=6, use_process_pool=False)
+    assert other_seed["teams"] != serial["teams"]
+    probabilities = np.array([team["position_probabilities"] for team in serial["teams"]])
+    assert np.allclose(probabilities.sum(axis=0), 1) and np.allclose(probabilities.sum(axis=1), 1)
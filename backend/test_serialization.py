@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import serialization
+from serialization import COMPRESSION_MIN_BYTES, dumps_json, fast_response, preferred
+
+
+def make_client(content):
+    app = FastAPI()
+
+    @app.get("/rows")
+    async def rows(request: Request):
+        return fast_response(request, content, {"X-Next-Cursor": "abc"})
+
+    return TestClient(app)
+
+
+def test_preferred_honours_q_values_and_order():
+    assert preferred("application/json;q=0.5, application/msgpack", ("application/json", "application/msgpack")) == "application/msgpack"
+    assert preferred("*/*", ("application/json", "application/msgpack")) == "application/json"
+    assert preferred("gzip, br;q=0", ("br", "gzip")) == "gzip"
+    assert preferred("identity", ("br", "gzip")) is None
+    assert preferred(None, ("br", "gzip")) is None
+
+
+def test_dumps_json_writes_numpy_values_like_lists():
+    content = {"outcomes": np.array([1.5, 2.0, 3.25]), "count": np.int64(3)}
+    assert json.loads(dumps_json(content)) == {"outcomes": [1.5, 2.0, 3.25], "count": 3}
+
+
+def test_small_bodies_are_not_compressed():
+    response = make_client([{"id": 1}]).get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.json() == [{"id": 1}]
+
+
+def test_large_bodies_are_gzipped_when_accepted():
+    rows = [{"id": i, "team_name": "Synthetic Team"} for i in range(COMPRESSION_MIN_BYTES)]
+    client = make_client(rows)
+
+    response = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == rows
+
+    plain = client.get("/rows", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert int(response.headers["content-length"]) < len(plain.content)
+
+
+def test_brotli_is_preferred_when_installed():
+    brotli = pytest.importorskip("brotli")
+    rows = [{"id": i} for i in range(COMPRESSION_MIN_BYTES)]
+    client = make_client(rows)
+    response = client.get("/rows", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == rows
+    assert brotli is serialization.brotli
+
+
+def test_msgpack_is_negotiated_from_accept():
+    msgpack = pytest.importorskip("msgpack")
+    content = {"outcomes": np.array([1.5, 2.5]), "rows": [{"id": 1}]}
+    response = make_client(content).get("/rows", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == {"outcomes": [1.5, 2.5], "rows": [{"id": 1}]}
+
+
+def test_json_is_the_default_without_msgpack(monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+    response = make_client([{"id": 1}]).get("/rows", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,62 @@
+import sqlite3
+
+import setup_database
+from data_version import read_data_version
+
+
+def write_csv_files(data_dir, results=(141, 154)):
+    data_dir.mkdir(exist_ok=True)
+    (data_dir / "simulations.csv").write_text(
+        "team_id,team,simulation_run,results\n"
+        f"0,Peterborough Strikers,1,{results[0]}\n"
+        f"0,Peterborough Strikers,2,{results[1]}\n"
+        "1,Hull Stars,1,130\n"
+        "1,Hull Stars,2,170\n"
+    )
+    (data_dir / "venues.csv").write_text(
+        "venue_id,venue_name,home_multiplier\n"
+        "0,The Square,1.32\n"
+    )
+    (data_dir / "games.csv").write_text(
+        "home_team,away_team,date,venue_id\n"
+        "Hull Stars,Peterborough Strikers,2024-03-27,0\n"
+    )
+
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ["teams", "venues", "simulations", "games", "matchup_matrix"]
+    }
+    conn.close()
+    return counts
+
+
+def test_reloading_is_idempotent(tmp_path, monkeypatch):
+    """Running setup twice, or after the CSVs change, never duplicates rows"""
+    backend_dir = tmp_path / "backend"
+    backend_dir.mkdir()
+    write_csv_files(tmp_path / "data")
+    monkeypatch.chdir(backend_dir)
+
+    setup_database.create_database()
+    expected = {"teams": 2, "venues": 1, "simulations": 4, "games": 1, "matchup_matrix": 4}
+    assert table_counts("plutodata.db") == expected
+
+    # Unchanged files are skipped entirely
+    setup_database.create_database()
+    conn = sqlite3.connect("plutodata.db")
+    assert read_data_version(conn.cursor()) == 1
+    conn.close()
+
+    # Changed files are upserted on their natural keys
+    write_csv_files(tmp_path / "data", results=(99, 154))
+    setup_database.create_database()
+    assert table_counts("plutodata.db") == expected
+    conn = sqlite3.connect("plutodata.db")
+    assert conn.execute(
+        "SELECT results FROM simulations WHERE team_id = 0 AND simulation_run = 1"
+    ).fetchone()[0] == 99
+    assert read_data_version(conn.cursor()) == 2
+    conn.close()
@@ -0,0 +1,112 @@
+import sqlite3
+
+import numpy as np
+
+from migrations import migrate
+from score_file import write_score_file
+from simulation_store import SimulationStore
+
+
+def make_connection():
+    """In-memory database with a handful of teams, venues and runs"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'Zeta'), (1, 'Alpha'), (2, 'Empty');
+        INSERT INTO venues VALUES (0, 'The Square', 1.32), (1, 'Lady''s', 1.0);
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 150), (1, 1, 120), (0, 2, 110), (1, 2, 180), (0, 3, 130);
+    """)
+    return conn
+
+
+def test_store_loads_sorted_arrays_per_team():
+    """Each team's runs are a sorted, contiguous view of one shared array"""
+    store = SimulationStore()
+    store.load(make_connection())
+
+    assert store.team_scores(0).tolist() == [110, 130, 150]
+    assert store.team_scores(1).tolist() == [120, 180]
+    assert store.team_scores(2).tolist() == []
+    assert store.team_scores(0).flags["C_CONTIGUOUS"]
+    assert store.team_scores(0).base is store.scores
+
+
+def test_store_lookups_and_memory_usage():
+    """Team and venue lookups are dicts and memory use is reported"""
+    store = SimulationStore()
+    store.load(make_connection())
+
+    assert list(store.teams.values()) == ["Alpha", "Empty", "Zeta"]
+    assert store.team_ids_by_name["Zeta"] == 0
+    assert store.venues[0]["home_multiplier"] == 1.32
+    assert store.memory_usage() == {"data_version": 0, "teams": 3, "venues": 2, "simulation_runs": 5, "score_bytes": 20}
+
+
+def test_store_value_counts_are_cached_per_load():
+    """Distinct scores and counts are computed once and reset by a reload"""
+    conn = make_connection()
+    store = SimulationStore()
+    store.load(conn)
+
+    values, counts = store.team_value_counts(0)
+    assert values.tolist() == [110, 130, 150] and counts.tolist() == [1, 1, 1]
+    assert store.team_value_counts(0) is store.team_value_counts(0)
+    assert store.team_value_counts(2)[0].size == 0
+
+    conn.execute("INSERT INTO simulations (team_id, simulation_run, results) VALUES (0, 4, 130)")
+    store.load(conn)
+    assert store.team_value_counts(0)[1].tolist() == [1, 2, 1]
+
+
+def test_added_runs_are_merged_without_touching_the_score_file(tmp_path):
+    """New runs give the team a merged sorted copy; other teams keep their mapped views"""
+    conn = make_connection()
+    score_path = tmp_path / "plutodata.scores"
+    write_score_file(conn, score_path, data_version=0)
+    store = SimulationStore()
+    store.load(conn, score_path)
+    store.team_value_counts(0)
+
+    assert store.add_runs(0, [130, 90, 200], data_version=1) == 6
+    assert store.team_scores(0).tolist() == [90, 110, 130, 130, 150, 200]
+    assert store.team_scores(1).base is store.scores
+    assert store.scores.tolist() == [110, 130, 150, 120, 180]
+    values, counts = store.team_value_counts(0)
+    assert values.tolist() == [90, 110, 130, 150, 200] and counts.tolist() == [1, 1, 2, 1, 1]
+
+    assert store.add_runs(2, [75], data_version=2) == 1
+    assert store.team_scores(2).tolist() == [75]
+    assert store.data_version == 2
+    assert store.memory_usage()["simulation_runs"] == 9
+
+
+def test_store_maps_score_file_for_current_data_version(tmp_path):
+    """A score file for the current data version is mapped instead of read from SQLite"""
+    conn = make_connection()
+    score_path = tmp_path / "plutodata.scores"
+    assert write_score_file(conn, score_path, data_version=0) == 5
+
+    store = SimulationStore()
+    store.load(conn, score_path)
+
+    assert store.score_source == "mmap"
+    assert isinstance(store.scores, np.memmap)
+    assert store.team_scores(0).tolist() == [110, 130, 150]
+    assert store.team_scores(1).tolist() == [120, 180]
+    assert store.team_scores(2).tolist() == []
+    assert store.team_scores(0).base is store.scores
+
+
+def test_store_ignores_stale_or_missing_score_file(tmp_path):
+    conn = make_connection()
+    score_path = tmp_path / "plutodata.scores"
+    write_score_file(conn, score_path, data_version=3)
+
+    stale = SimulationStore()
+    stale.load(conn, score_path)
+    missing = SimulationStore()
+    missing.load(conn, tmp_path / "missing.scores")
+
+    assert stale.score_source == missing.score_source == "sqlite"
+    assert stale.team_scores(0).tolist() == [110, 130, 150]
@@ -0,0 +1,76 @@
+import sqlite3
+
+import numpy as np
+
+from migrations import migrate
+from simulation_store import SimulationStore
+from team_stats import TeamStats, TeamSummary, add_team_score_counts, build_team_score_counts, quantile_label
+
+
+def make_connection():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executescript("""
+        INSERT INTO teams VALUES (0, 'Zeta'), (1, 'Alpha'), (2, 'Empty');
+        INSERT INTO simulations (team_id, simulation_run, results) VALUES
+            (0, 1, 150), (1, 1, 120), (0, 2, 110), (1, 2, 180), (0, 3, 130), (0, 4, 130);
+        INSERT INTO metadata VALUES ('data_version', '1');
+    """)
+    return conn
+
+
+def test_summary_matches_numpy():
+    rng = np.random.default_rng(11)
+    scores = rng.integers(60, 240, 5_000)
+    values, counts = np.unique(scores, return_counts=True)
+    stats = TeamSummary(values, counts).describe((0.1, 0.5, 0.99))
+
+    assert stats["runs"] == 5_000
+    assert stats["mean"] == round(scores.mean(), 2)
+    assert stats["std"] == round(scores.std(), 2)
+    assert (stats["min"], stats["max"]) == (scores.min(), scores.max())
+    assert stats["quantiles"] == {
+        f"p{round(q * 100):02d}": int(np.quantile(scores, q, method="inverted_cdf")) for q in (0.1, 0.5, 0.99)
+    }
+    assert TeamSummary([], []).describe()["runs"] == 0
+
+
+def test_quantile_labels_do_not_collide():
+    quantiles = (0, 0.001, 0.02, 0.025, 0.05, 0.07, 0.5, 0.999, 1)
+    labels = [quantile_label(q) for q in quantiles]
+    assert labels == ["p00", "p0.1", "p02", "p2.5", "p05", "p07", "p50", "p99.9", "p100"]
+
+
+def test_summary_table_is_built_and_updated_in_place():
+    conn = make_connection()
+    assert build_team_score_counts(conn) == 5
+    add_team_score_counts(conn.cursor(), 0, [130, 90])
+    assert conn.execute("SELECT results, runs FROM team_score_counts WHERE team_id = 0").fetchall() == [
+        (90, 1), (110, 1), (130, 3), (150, 1)
+    ]
+
+
+def test_stats_load_from_table_or_from_store():
+    conn = make_connection()
+    store = SimulationStore()
+    store.load(conn)
+
+    stale = TeamStats()
+    stale.load(conn, store)
+    build_team_score_counts(conn)
+    current = TeamStats()
+    current.load(conn, store)
+
+    assert (stale.source, current.source) == ("store", "table")
+    for stats in (stale, current):
+        assert stats.get(0).describe((0.5,)) == {
+            "runs": 4, "mean": 130.0, "std": 14.14, "min": 110, "max": 150, "quantiles": {"p50": 130}
+        }
+        assert stats.get(2).runs == 0
+
+    current.add_runs(2, [100, 140], data_version=2)
+    assert current.get(2).describe((0.5,))["mean"] == 120.0
+    assert current.data_version == 2
+    # The store is still on version 1, so its scores win over the newer summary
+    assert current.get(2, store).runs == 0
+    assert current.get(0, store).runs == 4